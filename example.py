@@ -13,6 +13,7 @@ HERE = Path(__file__).resolve().parent
 BIN_TO_ANALYZE = settings.ELF_FILE
 FILE_TO_SAVE = HERE / "example_size_results.txt"
 COMPLETE_FILE = HERE / "example_size_results_complete.txt"
+APPS_DIR_RE = re.compile(r"src/apps/(\w+)/")  # dir name after apps/
 
 
 def binary_size_example() -> None:
@@ -44,8 +45,10 @@ def binary_size_example_complete_data() -> None:
 
 def statistics_example_mpy_apps() -> None:
     def _apps_categories(row: DataRow) -> str | None:
-        pattern = r"^src/apps/(\w+)/"  # dir name after apps/
-        match = re.search(pattern, row.module_name)
+        # Most of the rows are not from apps, no need to run the regex for them
+        if not row.module_name.startswith("src/apps/"):
+            return None
+        match = APPS_DIR_RE.match(row.module_name)
         if not match:
             return None
         else:
@@ -4,14 +4,31 @@ Main entry-point of the CLI for the `binsize` command.
 
 from __future__ import annotations
 
-import click
+import importlib
 import sys
 
+import click
+
 from .. import set_root_dir
-from . import build, commit, compare, get, history, tree
 
+# Each subcommand lives in a module of the same name
+SUBCOMMANDS = ("build", "commit", "compare", "get", "history", "tree")
+
+
+class LazyGroup(click.Group):
+    """Importing the subcommand module only when it is really invoked."""
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return list(SUBCOMMANDS)
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in SUBCOMMANDS:
+            return None
+        module = importlib.import_module(f".{cmd_name}", package=__package__)
+        return getattr(module, cmd_name)
 
-@click.group(invoke_without_command=True)
+
+@click.group(cls=LazyGroup, invoke_without_command=True)
 @click.option("-r", "--root-dir", help="Root directory of the project")
 @click.option("-v", "--version", is_flag=True, help="Show current version and exit")
 def cli(root_dir: str | None, version: bool) -> None:
@@ -31,13 +48,15 @@ def cli(root_dir: str | None, version: bool) -> None:
         set_root_dir(root_dir)
 
 
-cli.add_command(build.build)
-cli.add_command(commit.commit)
-cli.add_command(compare.compare)
-cli.add_command(get.get)
-cli.add_command(history.history)
-cli.add_command(tree.tree)
+def main() -> None:
+    """Entry-point answering the version query without any click processing."""
+    if len(sys.argv) >= 2 and sys.argv[1] in ("-v", "--version"):
+        from .. import __version__
+
+        print(__version__)
+        sys.exit(0)
+    cli()
 
 
 if __name__ == "__main__":
-    cli()
+    main()
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import os
 import shutil
 import subprocess
 from pathlib import Path
@@ -27,9 +28,8 @@ def build_binary(extra_suffix: str | None = None) -> None:
     build_cmd = settings.get("build_cmd")
     print(f"building the binary... `{build_cmd}`")
 
-    build_result = subprocess.run(
-        build_cmd, stdout=subprocess.PIPE, text=True, shell=True
-    )
+    # Output is not needed, only errors (in stderr) are shown to the user
+    build_result = subprocess.run(build_cmd, stdout=subprocess.DEVNULL, shell=True)
     if build_result.returncode != 0:
         print("build failed - see output above")
         exit(1)
@@ -39,9 +39,29 @@ def build_binary(extra_suffix: str | None = None) -> None:
         elf_file = settings.get("elf_file")
 
         new_path = Path(f"{elf_file}_{extra_suffix}")
-        shutil.copyfile(elf_file, new_path)
+        copy_binary(elf_file, new_path)
         print(f"Binary copied as `{new_path}`")
 
 
+def copy_binary(src: str | Path, dst: str | Path) -> None:
+    """Copy the binary, letting the kernel share the data blocks if possible.
+
+    `copy_file_range` reflinks on filesystems supporting it (btrfs, xfs),
+    otherwise it at least copies without going through userspace.
+    Not hardlinking, as the build could overwrite the original file in place.
+    """
+    try:
+        with open(src, "rb") as f_src, open(dst, "wb") as f_dst:
+            remaining = os.fstat(f_src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(f_src.fileno(), f_dst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except (AttributeError, OSError):
+        # Not available on this platform/filesystem
+        shutil.copyfile(src, dst)
+
+
 if "__main__" == __name__:
     build()
@@ -4,20 +4,31 @@ Checking the size differences introduced by a specified commit.
 
 from __future__ import annotations
 
+import subprocess
+
 import click
 
 from .. import get_sections_sizes
-from .history import build_and_rename_fw, get_commit_hashes, get_fw_path
+from .history import build_and_rename_fw, build_worktree, get_fw_path
 
 
 def get_previous_commit_hash(commit_hash: str) -> tuple[str, str]:
-    commit_hashes = get_commit_hashes()
-    for index, commit in enumerate(commit_hashes):
-        if commit.startswith(commit_hash):
-            # returning full commit hash as well to unify its length
-            return commit, commit_hashes[index + 1]
+    # returning full commit hash as well to unify its length
+    try:
+        full_hash = _rev_parse(f"{commit_hash}^{{commit}}")
+    except subprocess.CalledProcessError:
+        raise ValueError(f"Commit {commit_hash} not found")
+    try:
+        previous_hash = _rev_parse(f"{full_hash}^")
+    except subprocess.CalledProcessError:
+        raise ValueError(f"Commit {commit_hash} has no parent")
+    return full_hash, previous_hash
+
 
-    raise ValueError(f"Commit {commit_hash} not found")
+def _rev_parse(revision: str) -> str:
+    return subprocess.check_output(
+        ["git", "rev-parse", "--verify", "--quiet", revision], text=True
+    ).strip()
 
 
 @click.command()
@@ -29,8 +40,9 @@ def commit(commit_hash: str, sections: list[str]) -> None:
     """Show how much commit affected binary size."""
     full_hash, previous_hash = get_previous_commit_hash(commit_hash)
 
-    build_and_rename_fw(full_hash)
-    build_and_rename_fw(previous_hash)
+    with build_worktree() as worktree_dir:
+        build_and_rename_fw(full_hash, worktree_dir)
+        build_and_rename_fw(previous_hash, worktree_dir)
 
     current_size = get_sections_sizes(get_fw_path(full_hash), sections)
     previous_size = get_sections_sizes(get_fw_path(previous_hash), sections)
@@ -22,11 +22,14 @@ Example usage:
 
 from __future__ import annotations
 
-from fnmatch import fnmatch
+import re
+from fnmatch import translate
+from functools import reduce
+from typing import Callable
 
 import click
 
-from .. import BinarySize
+from .. import BinarySize, DataRow
 from .build import build_binary
 
 
@@ -112,29 +115,81 @@ def get(
 
     if not no_aggregation:
         BS.aggregate()
+    # Filtering in one pass before sorting, so that only the remaining rows are sorted
+    row_filter = get_row_filter(language, module_name, func_name, grep)
+    if row_filter is not None:
+        BS.filter(row_filter)
     if not no_sort:
         BS.sort(lambda row: row.size, reverse=True)
 
+    if add_definitions:
+        BS.add_definitions()
+
+    BS.show(output_file or None, debug=debug)
+
+
+def get_row_filter(
+    language: str | None,
+    module_name: str | None,
+    func_name: str | None,
+    grep: str | None,
+) -> Callable[[DataRow], bool] | None:
+    """Combine all the specified filters into one function. None if there are none.
+
+    Predicates are chained directly, without any per-row generator or loop.
+    """
+    predicates = get_row_predicates(language, module_name, func_name, grep)
+    if not predicates:
+        return None
+    return reduce(_both, predicates)
+
+
+def _both(
+    first: Callable[[DataRow], bool], second: Callable[[DataRow], bool]
+) -> Callable[[DataRow], bool]:
+    return lambda row: first(row) and second(row)
+
+
+def get_row_predicates(
+    language: str | None,
+    module_name: str | None,
+    func_name: str | None,
+    grep: str | None,
+) -> list[Callable[[DataRow], bool]]:
+    """Get row filters for all the specified options, the cheapest ones first."""
+    predicates: list[Callable[[DataRow], bool]] = []
+
     if language:
-        BS.filter(lambda row: row.language == language)
+        predicates.append(lambda row: row.language == language)
     if module_name:
-        BS.filter(lambda row: fnmatch(row.module_name, module_name))
+        # Translating the shell-style wildcard just once, not for every row
+        module_name_match = re.compile(translate(module_name)).match
+        predicates.append(lambda row: module_name_match(row.module_name) is not None)
     if func_name:
         # There could be an object or not ... Bitcoin.sign_tx vs sign_tx
         # If not, we need to account for the possible object in row.func_name
+        # Cheap substring check rejects most rows before any string is created
         if "." in func_name:
-            BS.filter(lambda row: row.func_name.rstrip("()") == func_name)
-        else:
-            BS.filter(
-                lambda row: row.func_name.rstrip("()").split(".")[-1] == func_name
+            predicates.append(
+                lambda row: func_name in row.func_name
+                and row.func_name.rstrip("()") == func_name
             )
-    if grep:
-        BS.filter(lambda row: grep.lower() in str(row).lower())
+        else:
+            dot_func_name = f".{func_name}"
 
-    if add_definitions:
-        BS.add_definitions()
+            def _func_name_matches(row: DataRow) -> bool:
+                if func_name not in row.func_name:
+                    return False
+                stripped = row.func_name.rstrip("()")
+                return stripped == func_name or stripped.endswith(dot_func_name)
 
-    BS.show(output_file or None, debug=debug)
+            predicates.append(_func_name_matches)
+    if grep:
+        # Stringifying the whole row is the most expensive, so it goes last
+        grep_lower = grep.lower()
+        predicates.append(lambda row: grep_lower in row.searchable())
+
+    return predicates
 
 
 if "__main__" == __name__:
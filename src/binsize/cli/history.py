@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import os
 import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Generator, Sequence
 
@@ -13,109 +17,215 @@ import click
 from binsize import settings
 
 from .. import get_sections_sizes
+from ..lib import size_cache
+from .build import copy_binary
 
 ELF_FILE = settings.get("elf_file")
 BUILD_CMD = settings.get("build_cmd")
 
+# Commit timestamps never change, so they can be remembered for the whole run
+_TS_CACHE: dict[str, int] = {}
 
-def run_cmd(cmd: list[str]) -> None:
-    print(f"Running {cmd}")
-    subprocess.check_call(cmd, stdout=subprocess.DEVNULL)
 
+def output(line: str, log: list[str] | None = None) -> None:
+    """Print the line, or collect it into the log to be printed later at once."""
+    if log is None:
+        print(line)
+    else:
+        log.append(line)
 
+
+def run_cmd(
+    cmd: list[str], log: list[str] | None = None, cwd: Path | None = None
+) -> None:
+    output(f"Running {cmd}", log)
+    subprocess.check_call(cmd, stdout=subprocess.DEVNULL, cwd=cwd)
+
+
+@lru_cache(maxsize=None)
 def get_commit_hashes(amount_in_past: int = 10_000) -> list[str]:
     commit_hashes = subprocess.check_output(
-        ["git", "log", "--pretty=format:%H", "-n", str(amount_in_past)]
+        ["git", "log", "--pretty=format:%H", "-n", str(amount_in_past)], text=True
     )
-    return commit_hashes.decode().splitlines()
+    return commit_hashes.splitlines()
+
+
+def _prefill_timestamps(commit_hashes: Sequence[str]) -> None:
+    """Get timestamps of all the commits in one git call and cache them."""
+    if not commit_hashes:
+        return
+    log_output = subprocess.check_output(
+        ["git", "show", "-s", "--format=%H %ct", *commit_hashes], text=True
+    )
+    for line in log_output.splitlines():
+        commit_hash, _, timestamp = line.partition(" ")
+        if timestamp:
+            _TS_CACHE[commit_hash] = int(timestamp)
 
 
 def get_commit_timestamp(commit_hash: str) -> int:
+    if commit_hash in _TS_CACHE:
+        return _TS_CACHE[commit_hash]
     commit_timestamp = subprocess.check_output(
-        ["git", "show", "-s", "--format=%ct", commit_hash]
+        ["git", "show", "-s", "--format=%ct", commit_hash], text=True
     )
-    return int(commit_timestamp.decode())
+    _TS_CACHE[commit_hash] = int(commit_timestamp)
+    return _TS_CACHE[commit_hash]
 
 
+@lru_cache(maxsize=None)
 def get_commit_date(commit_hash: str) -> str:
     commit_timestamp = get_commit_timestamp(commit_hash)
     return datetime.fromtimestamp(commit_timestamp).strftime("%Y-%m-%d")
 
 
 def get_current_branch_name() -> str:
-    return (
-        subprocess.check_output(["git", "rev-parse", "--abbrev-ref", "HEAD"])
-        .decode()
-        .strip()
-    )
+    return subprocess.check_output(
+        ["git", "rev-parse", "--abbrev-ref", "HEAD"], text=True
+    ).strip()
 
 
 def get_current_commit_hash() -> str:
-    return subprocess.check_output(["git", "rev-parse", "HEAD"]).decode().strip()
+    return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
 
 
-def are_there_local_changes() -> bool:
-    return subprocess.call(["git", "diff", "--quiet", "--exit-code"]) != 0
+@lru_cache(maxsize=None)
+def get_repo_toplevel() -> str:
+    return subprocess.check_output(
+        ["git", "rev-parse", "--show-toplevel"], text=True
+    ).strip()
 
 
 def get_fw_path(commit_hash: str) -> Path:
     return Path(f"{ELF_FILE}_{commit_hash}")
 
 
+def in_worktree(path: str, worktree_dir: Path) -> str:
+    """Translate an absolute path in the main working tree to the worktree."""
+    # Only the whole path components, not e.g. a sibling "<toplevel>-tools" dir
+    toplevel = get_repo_toplevel()
+    if path == toplevel or path.startswith(toplevel + os.sep):
+        return f"{worktree_dir}{path[len(toplevel):]}"
+    return path
+
+
+def worktree_cwd(worktree_dir: Path) -> Path:
+    """Current directory of the main working tree, translated to the worktree."""
+    cwd = Path.cwd().resolve()
+    toplevel = Path(get_repo_toplevel()).resolve()
+    try:
+        relative_cwd = cwd.relative_to(toplevel)
+    except ValueError:
+        raise ValueError(
+            f"Current directory {cwd} is not inside the repository {toplevel}"
+        ) from None
+    return worktree_dir / relative_cwd
+
+
 @contextmanager
-def change_to_commit_and_back(commit_hash: str) -> Generator[None, None, None]:
-    """Context manager that changes to the given commit and then back."""
-    current_branch = get_current_branch_name()
-    # Fails if there are some local uncommited changes
-    if are_there_local_changes():
-        sys.exit(1)
-    run_cmd(["git", "checkout", commit_hash])
-    yield
-    run_cmd(["git", "reset", "--hard", "HEAD"])
-    run_cmd(["git", "checkout", current_branch])
-
-
-def build_and_rename_fw(commit_hash: str) -> None:
+def build_worktree() -> Generator[Path, None, None]:
+    """Context manager providing a separate working tree for building the binaries.
+
+    The main working tree (and its build state) stays untouched,
+    and one worktree is reused for all the builds, so they are incremental.
+    """
+    worktree_dir = Path(tempfile.mkdtemp(prefix="binsize-wt-"))
+    try:
+        run_cmd(
+            ["git", "worktree", "add", "--detach", "--no-checkout", str(worktree_dir)]
+        )
+    except BaseException:
+        # Not a worktree, git will not remove it
+        shutil.rmtree(worktree_dir, ignore_errors=True)
+        raise
+    try:
+        yield worktree_dir
+    finally:
+        run_cmd(["git", "worktree", "remove", "--force", str(worktree_dir)])
+
+
+def build_and_rename_fw(
+    commit_hash: str, worktree_dir: Path, log: list[str] | None = None
+) -> None:
     """Builds the binary at a specific commit hash and renames it according to it."""
     new_path = get_fw_path(commit_hash)
     if new_path.exists():
-        print(f"Binary already exists for commit {commit_hash}")
+        output(f"Binary already exists for commit {commit_hash}", log)
         return
 
-    with change_to_commit_and_back(commit_hash):
-        print(f"Building binary for commit {commit_hash}...")
-        # Need to download all the submodules for the current state
-        run_cmd(["git", "submodule", "update", "--init", "--recursive", "--force"])
-        run_cmd(BUILD_CMD.split())
-        shutil.copyfile(ELF_FILE, new_path)
+    output(f"Building binary for commit {commit_hash}...", log)
+    git_cmd = ["git", "-C", str(worktree_dir)]
+    run_cmd([*git_cmd, "checkout", "--detach", "--force", commit_hash], log)
+    # Need to download all the submodules for the current state
+    run_cmd([*git_cmd, "submodule", "update", "--init", "--recursive", "--force"], log)
+    # Relative paths (in the command or the ELF file) are relative to the current
+    # directory, so everything has to happen in its counterpart in the worktree
+    cwd = worktree_cwd(worktree_dir)
+    build_cmd = [in_worktree(arg, worktree_dir) for arg in BUILD_CMD.split()]
+    run_cmd(build_cmd, log, cwd=cwd)
+    copy_binary(cwd / in_worktree(ELF_FILE, worktree_dir), new_path)
 
 
 def create_binaries(commit_hashes: list[str]) -> None:
     """Build multiple binaries given list of commit hashes."""
-    for commit_hash in commit_hashes:
-        try:
-            print(commit_hash, get_commit_date(commit_hash))
-            build_and_rename_fw(commit_hash)
-        except Exception as e:
-            print(f"ERRROOOR: Failed to build binary for commit {commit_hash}: {e}")
-            run_cmd(["git", "reset", "--hard", "HEAD"])
+    with build_worktree() as worktree_dir:
+        for commit_hash in commit_hashes:
+            log: list[str] = []
+            try:
+                log.append(f"{commit_hash} {get_commit_date(commit_hash)}")
+                build_and_rename_fw(commit_hash, worktree_dir, log)
+            except Exception as e:
+                # Next commit is checked out with `--force`, no cleanup needed
+                log.append(
+                    f"ERRROOOR: Failed to build binary for commit {commit_hash}: {e}"
+                )
+            # Writing all the lines of one commit at once, before the next
+            # build starts writing its errors
+            sys.stdout.write("\n".join(log) + "\n")
+            sys.stdout.flush()
 
 
 def analyze_sizes(
-    commit_hashes: list[str], sections: Sequence[str] | None = None
+    commit_hashes: list[str],
+    sections: Sequence[str] | None = None,
+    jobs: int | None = None,
 ) -> None:
-    sizes: dict[str, dict[str, int]] = {}
+    existing_hashes: list[str] = []
+    missing_lines: list[str] = []
     for commit_hash in commit_hashes:
-        print(commit_hash[:8], get_commit_date(commit_hash))
-        fw_path = get_fw_path(commit_hash)
-        if not fw_path.exists():
-            print(f"Binary not found for commit {commit_hash}")
+        if not get_fw_path(commit_hash).exists():
+            missing_lines.append(f"Binary not found for commit {commit_hash}")
             continue
-        size = get_sections_sizes(fw_path, sections)
-        print("size", size)
-        sizes[commit_hash] = size
-    for commit_hash, size in sizes.items():
-        print(commit_hash[:8], get_commit_date(commit_hash), size)
+        existing_hashes.append(commit_hash)
+
+    # Binaries analyzed in previous runs do not need to be analyzed again
+    cache = size_cache.load()
+    keys = {
+        commit_hash: size_cache.get_key(get_fw_path(commit_hash), sections)
+        for commit_hash in existing_hashes
+    }
+    uncached_hashes = [h for h in existing_hashes if keys[h] not in cache]
+
+    # Analyses of already built binaries are independent of each other,
+    # so running them in parallel (`map` keeps the original order)
+    if uncached_hashes:
+        fw_paths = [get_fw_path(commit_hash) for commit_hash in uncached_hashes]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            all_sizes = executor.map(
+                partial(get_sections_sizes, sections=sections), fw_paths
+            )
+            for commit_hash, size in zip(uncached_hashes, all_sizes):
+                cache[keys[commit_hash]] = size
+        size_cache.save(cache)
+
+    sizes = {commit_hash: cache[keys[commit_hash]] for commit_hash in existing_hashes}
+
+    # Writing all the results at once, when everything is collected
+    result_lines = [
+        f"{commit_hash[:8]} {get_commit_date(commit_hash)} {size}"
+        for commit_hash, size in sizes.items()
+    ]
+    sys.stdout.write("\n".join(missing_lines + result_lines) + "\n")
 
 
 def generate_hashes_from_past(in_past: int, step: int) -> list[str]:
@@ -132,14 +242,21 @@ def generate_hashes_from_past(in_past: int, step: int) -> list[str]:
 @click.option(
     "-s", "--sections", multiple=True, help="Sections which to analyze. All if not set."
 )
-def history(commits: int, step: int, sections: list[str]) -> None:
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    help="Number of binaries to analyze in parallel. CPU count if not set.",
+)
+def history(commits: int, step: int, sections: list[str], jobs: int | None) -> None:
     """Show the size of the binary over time."""
     print(f"Going {commits} commits into past with step {step}")
 
     # First building all the binaries and then analyzing them
     commit_hashes = generate_hashes_from_past(commits, step)
+    _prefill_timestamps(commit_hashes)
     create_binaries(commit_hashes)
-    analyze_sizes(commit_hashes, sections)
+    analyze_sizes(commit_hashes, sections, jobs)
 
 
 if __name__ == "__main__":
@@ -4,14 +4,19 @@ Defining all the interfaces between components.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Callable, Protocol, Sequence
 
 from typing_extensions import Self
 
+# Slots make the (possibly hundreds of thousands of) rows smaller and faster
+# to access, but are supported by dataclasses only from python 3.10
+SLOTS: dict[str, bool] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**SLOTS)
 class DataRow:
     # Initial info, coming directly from `RowDataLoader`
     symbol_name: str
@@ -39,11 +44,18 @@ class DataRow:
     # source definition in `embed/rust/src`
     source_definition: str = ""  # definition in the source file
 
+    # Cached result of `id()`, only once the basic info is there
+    # (it does not change afterwards)
+    _id: str = field(default="", init=False, repr=False, compare=False)
+
     def id(self) -> str:
         """Identifying this row"""
         # Used when aggregating alike rows together
         # Each non-alike row should be always unique, even when no basic info is filled
         # Need to include a section, not to mix same-named items from different sections
+        if self._id:
+            return self._id
+
         def _name_id() -> str:
             if self.module_name and self.func_name:
                 return f"{self.module_name}::{self.func_name}"
@@ -54,7 +66,15 @@ class DataRow:
             else:
                 return self.symbol_name
 
-        return f"{self.section}_{_name_id()}"
+        row_id = f"{self.section}_{_name_id()}"
+        if self.module_name or self.func_name:
+            self._id = row_id
+        return row_id
+
+    def searchable(self) -> str:
+        """Lowercase text of all the row data, for case-insensitive searching"""
+        # Not cached, any field can still change (sizes, definitions, ...)
+        return str(self).lower()
 
     def format(self, debug: bool = False) -> str:
         """Nicely formatting this row"""
@@ -147,7 +167,12 @@ class MapFileIncluderAPI(Protocol):
 
 
 class BinarySizeAPI(Protocol):
-    """Highest level component, putting everything together and exposing it."""
+    """Highest level component, putting everything together and exposing it.
+
+    NOTE: loaded rows are owned by this object - the `add_XXX()` and `use_map_file()`
+    operations are modifying them in place. `load_data()` only copies the list,
+    not the rows themselves. `aggregate()` creates new rows for the groups.
+    """
 
     def load_file(
         self,
@@ -15,9 +15,9 @@ See the `api.BinarySizeAPI` for full description.
 
 from __future__ import annotations
 
-from collections import defaultdict
-from copy import deepcopy
-from itertools import count
+import os
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Sequence
 
@@ -44,6 +44,11 @@ if TYPE_CHECKING:  # pragma: no cover
 
 DEFINITIONS_CACHE_FILE = cache_dir / "DEFINITIONS_CACHE.json"
 
+# Parallelization of add_definitions()
+# (as many workers as grep processes the CPUs can run, plus some for file reads)
+DEFINITIONS_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+DEFINITIONS_CHUNK_SIZE = 64
+
 
 class BinarySize(BinarySizeAPI):
     NO_DATA_MSG = "There are no data. Call load_xxx() first."
@@ -130,16 +135,39 @@ class BinarySize(BinarySizeAPI):
             )
 
         progress_bar = ProgressBar(len(self.row_data))
-        progress_counter = count(start=1)
+
+        def _is_wanted(row: DataRow) -> bool:
+            return condition is None or condition(row) is not False
 
         def _include_definitions(row: DataRow) -> DataRow:
-            progress_bar.update(next(progress_counter))
-            if condition is not None and condition(row) is False:
+            if not _is_wanted(row):
                 return row
             else:
                 return self.row_handler_factory(row).add_definition(row)
 
-        self.row_data = [_include_definitions(row) for row in self.row_data]
+        # Handlers might get the definitions quicker for all the rows at once
+        # (optional, custom factories do not need to support it)
+        prefetch = getattr(self.row_handler_factory, "prefetch_definitions", None)
+        if prefetch is not None:
+            prefetch([row for row in self.row_data if _is_wanted(row)])
+
+        def _include_definitions_chunk(rows: list[DataRow]) -> list[DataRow]:
+            return [_include_definitions(row) for row in rows]
+
+        # Getting definitions is mostly waiting for `grep` and file reads,
+        # so it can run in more threads. Processing the rows in chunks,
+        # so that the warm-cache runs are not slowed down by per-row tasks.
+        # Caches are only ever adding whole items, which is safe under the GIL.
+        chunks = [
+            self.row_data[i : i + DEFINITIONS_CHUNK_SIZE]
+            for i in range(0, len(self.row_data), DEFINITIONS_CHUNK_SIZE)
+        ]
+        new_row_data: list[DataRow] = []
+        with ThreadPoolExecutor(max_workers=DEFINITIONS_WORKERS) as executor:
+            for processed_chunk in executor.map(_include_definitions_chunk, chunks):
+                new_row_data.extend(processed_chunk)
+                progress_bar.update(len(new_row_data))
+        self.row_data = new_row_data
         return self
 
     def use_map_file(
@@ -220,7 +248,8 @@ class BinarySize(BinarySizeAPI):
         ), "only one load option can be specified"
 
         if row_data:
-            self.row_data = row_data
+            # Not to change the caller's list when filtering, adding rows etc.
+            self.row_data = list(row_data)
             return self
         elif bin_file:
             self.row_data = self.data_loader.load_data_from_file(bin_file, sections)
@@ -266,8 +295,10 @@ class BinarySize(BinarySizeAPI):
         assert self.build_def_loader is not None
         self.build_def_loader.load(bin_file)
 
+        # Bound once, this is called for every single row
+        get_build_definition = self.build_def_loader.get
         for row in row_data:
-            build_definition = self.build_def_loader.get(row.symbol_name)
+            build_definition = get_build_definition(row.symbol_name)
             if build_definition is not None:
                 row.build_definition = build_definition
 
@@ -279,18 +310,20 @@ def aggregate_rows(row_data: list[DataRow]) -> list[DataRow]:
 
     Using DataRow.id() as the identifier for aggregation.
     """
-    deduplication_dict: dict[str, list[DataRow]] = defaultdict(list)
+    aggregated: dict[str, DataRow] = {}
     for row in row_data:
-        deduplication_dict[row.id()].append(row)
-
-    new_rows: list[DataRow] = []
-    # Calculating the overall size of rows belonging together
-    for alike_rows in deduplication_dict.values():
-        new_row = deepcopy(alike_rows[0])  # apart from size, all rows are the same
-        new_row.size = sum(row.size for row in alike_rows)
-        new_row.logic_size = sum(row.logic_size for row in alike_rows)
-        new_row.data_size = sum(row.data_size for row in alike_rows)
-        new_row.number_of_symbols = len(alike_rows)
-        new_rows.append(new_row)
-
-    return new_rows
+        row_id = row.id()
+        existing = aggregated.get(row_id)
+        if existing is None:
+            # Apart from sizes, all alike rows are the same
+            # Copying not to modify the original rows, all the fields are immutable
+            new_row = copy(row)
+            new_row.number_of_symbols = 1
+            aggregated[row_id] = new_row
+        else:
+            existing.size += row.size
+            existing.logic_size += row.logic_size
+            existing.data_size += row.data_size
+            existing.number_of_symbols += 1
+
+    return list(aggregated.values())
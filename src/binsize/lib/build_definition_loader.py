@@ -9,6 +9,7 @@ from __future__ import annotations
 import subprocess
 import sys
 from pathlib import Path
+from typing import Iterable
 
 from .. import settings
 from .api import BuildDefinitionLoaderAPI
@@ -21,29 +22,36 @@ class BuildDefinitionLoader(BuildDefinitionLoaderAPI):
         self.symbol_build_definitions: dict[str, str] = {}
 
     def load(self, bin_file: str | Path) -> None:
-        nm_output = get_nm_output(bin_file)
-        for line in nm_output.splitlines():
+        nm_cmd = [
+            "arm-none-eabi-nm",
+            "--line-numbers",
+            "--radix=dec",
+            "--size-sort",
+            str(bin_file),
+        ]
+        print(f"Running CMD: `{' '.join(nm_cmd)}`")
+        # Processing the output as it comes, not to hold all of it in memory
+        with subprocess.Popen(nm_cmd, stdout=subprocess.PIPE, text=True) as process:
+            assert process.stdout is not None
+            self._load_from_lines(process.stdout)
+
+        if process.returncode != 0:
+            print("command failed, see output above")
+            sys.exit(1)
+
+    def _load_from_lines(self, nm_lines: Iterable[str]) -> None:
+        symbol_build_definitions = self.symbol_build_definitions
+        for line in nm_lines:
             split_line = line.split()
             if len(split_line) < 4:
                 continue
             else:
                 _size, _mode, symbol, sym_def = split_line
                 # Sanitating the path to be relative to the root dir
-                if ROOT in sym_def:
-                    sym_def = sym_def.split(ROOT, maxsplit=1)[1]
-                self.symbol_build_definitions[symbol] = sym_def
+                _, root, relative_def = sym_def.partition(ROOT)
+                if root:
+                    sym_def = relative_def
+                symbol_build_definitions[symbol] = sym_def
 
     def get(self, symbol_name: str) -> str | None:
         return self.symbol_build_definitions.get(symbol_name, None)
-
-
-def get_nm_output(bin_file: str | Path) -> str:
-    nm_cmd = f"arm-none-eabi-nm --line-numbers --radix=dec --size-sort {bin_file}"
-    print(f"Running CMD: `{nm_cmd}`")
-    result = subprocess.run(nm_cmd, stdout=subprocess.PIPE, text=True, shell=True)
-
-    if result.returncode != 0:
-        print("command failed, see output above")
-        sys.exit(1)
-
-    return result.stdout
@@ -7,6 +7,7 @@ from __future__ import annotations
 import atexit
 import json
 import sys
+import threading
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable, TypeVar
 
@@ -25,17 +26,47 @@ def file_cache(
     Keys must be strings, as JSON does not support anything else.
     Decorated function also needs to have only one (string) argument.
     """
-    try:
-        cache: dict[str, R] = json.load(open(file_name, "r"))
-    except (IOError, ValueError):
-        cache = {}
-
-    atexit.register(lambda: json.dump(cache, open(file_name, "w"), indent=4))
+    cache: dict[str, R] = {}
+    # Loading only on the first use, not when the module gets imported
+    is_loaded = False
+    # Saving only when there is something new, not on read-only runs
+    has_changes = False
+    # Function may be called from more threads
+    lock = threading.Lock()
+
+    def _load_cache() -> None:
+        nonlocal is_loaded
+        with lock:
+            if is_loaded:
+                return
+            try:
+                with open(file_name, "rb") as f:
+                    cache.update(json.load(f))
+            except (IOError, ValueError):
+                pass
+            is_loaded = True
+
+    def _save_cache() -> None:
+        # Compact format - smaller file which is quicker to load next time
+        # (encoded in one go, which is quicker than `json.dump()`)
+        with open(file_name, "w") as f:
+            f.write(json.dumps(cache, separators=(",", ":")))
+
+    def _register_save() -> None:
+        nonlocal has_changes
+        with lock:
+            if not has_changes:
+                has_changes = True
+                atexit.register(_save_cache)
 
     def decorator(func: Callable[[str], R]) -> Callable[[str], R]:
         def new_func(param: str) -> R:
+            if not is_loaded:
+                _load_cache()
             if param not in cache:
                 cache[param] = func(param)
+                if not has_changes:
+                    _register_save()
             return cache[param]
 
         return new_func
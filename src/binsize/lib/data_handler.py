@@ -13,22 +13,40 @@ from .row_handler_mpy import MicropythonRow
 from .row_handler_rust import RustRow
 
 if TYPE_CHECKING:  # pragma: no cover
-    from .api import DataRow, RowHandlerAPI
+    from .api import DataRow
+    from .row_handler_common import CommonRow
     from .source_definition_cache import SourceDefinitionCache
 
 
 class RowHandlerFactory:
     def __init__(self, source_def_cache: SourceDefinitionCache | None = None) -> None:
         self.source_def_cache = source_def_cache
+        # Handlers do not hold any row-specific state, so one instance
+        # of each can serve all the rows
+        self.rust_handler = RustRow(source_def_cache)
+        self.mpy_handler = MicropythonRow(source_def_cache)
+        self.c_handler = CRow(source_def_cache)
 
-    def __call__(self, row: DataRow) -> RowHandlerAPI:
+    def __call__(self, row: DataRow) -> CommonRow:
         """Choose appropriate row handler for given row."""
         # Some rust functions look like C ones, but are defined in "/cargo/..."
         if row.symbol_name.startswith(RUST_PREFIXES) or row.build_definition.startswith(
             "/cargo/"
         ):
-            return RustRow(self.source_def_cache)
+            return self.rust_handler
         elif row.symbol_name.startswith(MPY_PREFIXES):
-            return MicropythonRow(self.source_def_cache)
+            return self.mpy_handler
         else:
-            return CRow(self.source_def_cache)
+            return self.c_handler
+
+    def prefetch_definitions(self, rows: list[DataRow]) -> None:
+        """Let the handlers prepare for adding definitions to these rows."""
+        handler_rows: dict[CommonRow, list[DataRow]] = {
+            self.rust_handler: [],
+            self.mpy_handler: [],
+            self.c_handler: [],
+        }
+        for row in rows:
+            handler_rows[self(row)].append(row)
+        for handler, rows_to_handle in handler_rows.items():
+            handler.prefetch_definitions(rows_to_handle)
@@ -10,20 +10,11 @@ import subprocess
 import sys
 from io import StringIO
 from pathlib import Path
-from typing import Sequence, cast
-
-from typing_extensions import TypedDict
+from typing import Iterable, Sequence
 
 from .api import DataRow, RowDataLoaderAPI
 
 
-class BloatyRow(TypedDict):
-    sections: str
-    symbols: str
-    vmsize: str
-    filesize: str
-
-
 class BloatyDataLoader(RowDataLoaderAPI):
     def __init__(self) -> None:
         pass
@@ -34,8 +25,19 @@ class BloatyDataLoader(RowDataLoaderAPI):
         if not Path(bin_file).exists():
             raise FileNotFoundError(f"File {bin_file} does not exist")
         bloaty_cmd = f"bloaty -n 0 -d sections,symbols -s vm --csv {bin_file}"
-        csv_output = self.get_csv_output(bloaty_cmd)
-        return self.load_data_from_csv(csv_output, sections)
+        print(f"Running CMD: `{bloaty_cmd}`")
+        # Processing the output as it comes, not to hold all of it in memory
+        with subprocess.Popen(
+            bloaty_cmd, stdout=subprocess.PIPE, text=True, shell=True
+        ) as process:
+            assert process.stdout is not None
+            row_data = self._get_row_data_from_lines(process.stdout, sections)
+
+        if process.returncode != 0:
+            print("command failed, see output above")
+            sys.exit(1)
+
+        return row_data
 
     @staticmethod
     def get_csv_output(bloaty_cmd: str) -> str:
@@ -53,25 +55,36 @@ class BloatyDataLoader(RowDataLoaderAPI):
     def load_data_from_csv(
         self, csv_output: str, sections: Sequence[str] | None = None
     ) -> list[DataRow]:
-        csv_reader = csv.DictReader(StringIO(csv_output))
-        bloaty_rows: list[BloatyRow] = [cast(BloatyRow, row) for row in csv_reader]
-
-        if not sections:
-            return self._get_row_data(bloaty_rows)
-        else:
-            relevant_bloaty_rows = [
-                row for row in bloaty_rows if row["sections"] in sections
-            ]
-            return self._get_row_data(relevant_bloaty_rows)
-
-    def _get_row_data(self, bloaty_rows: list[BloatyRow]) -> list[DataRow]:
-        return [self._get_data_row_from_bloaty_row(row) for row in bloaty_rows]
+        return self._get_row_data_from_lines(StringIO(csv_output), sections)
 
-    def _get_data_row_from_bloaty_row(self, bloaty_row: BloatyRow) -> DataRow:
-        symbol_name = bloaty_row["symbols"]
-        default_data_row = DataRow(
-            symbol_name=symbol_name,
-            section=bloaty_row["sections"],
-            size=int(bloaty_row["filesize"]),
-        )
-        return default_data_row
+    @staticmethod
+    def _get_row_data_from_lines(
+        csv_lines: Iterable[str], sections: Sequence[str] | None = None
+    ) -> list[DataRow]:
+        csv_reader = csv.reader(csv_lines)
+        header = next(csv_reader, None)
+        if header is None:
+            return []
+        # Accessing the columns by index, without creating a dict for each row
+        sections_index = header.index("sections")
+        symbols_index = header.index("symbols")
+        filesize_index = header.index("filesize")
+        wanted_sections = frozenset(sections) if sections else None
+
+        # There are only a few sections, so all rows can share the same strings
+        section_names: dict[str, str] = {}
+
+        row_data: list[DataRow] = []
+        for row in csv_reader:
+            section = row[sections_index]
+            if wanted_sections is not None and section not in wanted_sections:
+                continue
+            section = section_names.setdefault(section, section)
+            row_data.append(
+                DataRow(
+                    symbol_name=row[symbols_index],
+                    section=section,
+                    size=int(row[filesize_index]),
+                )
+            )
+        return row_data
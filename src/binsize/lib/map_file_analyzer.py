@@ -4,18 +4,24 @@ Outputting a symbol tree from a map file.
 
 from __future__ import annotations
 
+import io
+import mmap
+import os
 import textwrap
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 
 from typing_extensions import TypeAlias
 
 from .. import settings
+from .api import SLOTS
 
 if TYPE_CHECKING:
     SectionItemTree: TypeAlias = "dict[str, SectionItem | SectionItemTree]"
 
+# ".." is the only key without a "$" - the fast path in
+# _rust_demangle() relies on it
 REPLACEMENTS = {
     "$LT$": "<",
     "$GT$": ">",
@@ -25,7 +31,7 @@ REPLACEMENTS = {
 }
 
 
-@dataclass
+@dataclass(**SLOTS)
 class SectionItem:
     name: str
     entries: list[Entry] = field(default_factory=list)
@@ -34,7 +40,7 @@ class SectionItem:
         return sum(e.size for e in self.entries)
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Entry:
     section: SectionItem
     address: int
@@ -49,10 +55,9 @@ def show_map_file_tree(
 ) -> None:
     section_data = get_section_data(map_file, section_to_get)
 
-    section_tree = _build_per_char_tree(section_data)
-    section_tree = _prune_subtree(section_tree)
+    section_tree = _build_prefix_tree(section_data)
 
-    output = _subtree_sizes_output(section_tree)
+    output, _ = _subtree_sizes_output(section_tree)
 
     if file_to_save:
         print(f"Saving output to {file_to_save}")
@@ -63,18 +68,9 @@ def show_map_file_tree(
 
 
 def get_section_data(file: str | Path, section_to_get: str) -> dict[str, SectionItem]:
-    with open(file, "r") as f:
-        lines = f.read().splitlines()
-
-    # throw away lines until we encounter our section
-    while not (line := lines.pop(0)).startswith(f"{section_to_get} "):
-        pass
-
     section_data: dict[str, SectionItem] = {}
     current_section: SectionItem | None = None
-    for line in lines:
-        if line.startswith("."):  # another section starting
-            break
+    for line in _get_section_lines(file, section_to_get):
         elems = line.split()
         if elems and not elems[0].startswith("0x"):
             name = _rust_demangle(elems[0])
@@ -101,61 +97,114 @@ def get_section_data(file: str | Path, section_to_get: str) -> dict[str, Section
     return section_data
 
 
+def _get_section_lines(file: str | Path, section_to_get: str) -> Iterator[str]:
+    """Yield the lines belonging to the section, without reading the whole file."""
+    with open(file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Section {section_to_get} not found in {file}")
+        # Memory-mapping the file, so the section can be found by the (quick)
+        # bytes search instead of going through all the lines before it
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            section_header = f"{section_to_get} ".encode()
+            if mm[: len(section_header)] == section_header:
+                start = 0
+            else:
+                start = mm.find(b"\n" + section_header) + 1
+                if start == 0:
+                    raise ValueError(f"Section {section_to_get} not found in {file}")
+            start = mm.find(b"\n", start) + 1
+            if start == 0:
+                return
+
+            # Section ends where another section starts
+            end = mm.find(b"\n.", start - 1)
+            section_bytes = mm[start : end + 1] if end != -1 else mm[start:]
+
+    # Universal newlines, the same as when reading the file in text mode
+    yield from io.StringIO(section_bytes.decode(), newline=None)
+
+
 def _rust_demangle(symbol: str) -> str:
+    if "$" not in symbol:
+        return symbol.replace("..", "::")
     for k, v in REPLACEMENTS.items():
         symbol = symbol.replace(k, v)
     return symbol
 
 
-def _build_per_char_tree(section_data: dict[str, SectionItem]) -> SectionItemTree:
+def _build_prefix_tree(section_data: dict[str, SectionItem]) -> SectionItemTree:
+    """Build a tree of common name prefixes (radix tree).
+
+    No single-entry subtree exists in it (except the root one) - such chains
+    are already merged into a single key. The item whose name ends in a place
+    where other names continue is stored under the "" key.
+    """
     section_tree: SectionItemTree = {}
-    # build per-char tree
     for name, section in section_data.items():
-        current_subtree = section_tree
-        for char in name:
-            current_subtree = current_subtree.setdefault(char, {})
-            assert isinstance(current_subtree, dict)
-        current_subtree[""] = section
+        _insert_into_tree(section_tree, name, section)
 
     return section_tree
 
 
-# prune tree so that no single-entry subtree exists
-def _prune_subtree(tree: SectionItemTree) -> SectionItemTree:
-    new_tree: SectionItemTree = {}
-    for entry, subtree in tree.items():
-        while isinstance(subtree, dict) and len(subtree) == 1:
-            k, subtree = subtree.popitem()
-            entry += k
-        if isinstance(subtree, dict):
-            subtree = _prune_subtree(subtree)
-        new_tree[entry] = subtree
-    return new_tree
-
-
-def _total_subtree_size(tree: SectionItemTree) -> int:
-    total = 0
-    for subtree in tree.values():
-        if isinstance(subtree, dict):
-            total += _total_subtree_size(subtree)
+def _insert_into_tree(tree: SectionItemTree, name: str, section: SectionItem) -> None:
+    while name:
+        for key in tree:
+            if key and key[0] == name[0]:
+                break
         else:
-            total += subtree.total_size()
-    return total
+            tree[name] = section
+            return
+
+        common = len(os.path.commonprefix((key, name)))
+        subtree = tree[key]
+        if common < len(key):
+            # splitting the key, keeping its position for stable output order
+            subtree = {key[common:]: subtree}
+            _replace_key(tree, key, key[:common], subtree)
+        elif not isinstance(subtree, dict):
+            # the existing item ends here, while our name continues
+            subtree = {"": subtree}
+            tree[key] = subtree
+        tree = subtree
+        name = name[common:]
+
+    tree[""] = section
+
+
+def _replace_key(
+    tree: SectionItemTree, old_key: str, new_key: str, value: SectionItemTree
+) -> None:
+    items = list(tree.items())
+    tree.clear()
+    for key, subtree in items:
+        if key == old_key:
+            tree[new_key] = value
+        else:
+            tree[key] = subtree
 
 
-def _subtree_sizes_output(tree: SectionItemTree, name_prefix: str = "") -> str:
+def _subtree_sizes_output(
+    tree: SectionItemTree, name_prefix: str = ""
+) -> tuple[str, int]:
+    """Render the tree together with its sizes, returning also the total size.
+
+    Sizes are summed bottom-up on the way back from the recursion,
+    so every item is visited only once.
+    """
     lines: list[str] = []
+    total = 0
     for name, subtree in tree.items():
         if isinstance(subtree, dict):
             subtree_name = name_prefix + name
-            size = _total_subtree_size(subtree)
+            subsizes, size = _subtree_sizes_output(subtree, subtree_name)
             lines.append(f"{subtree_name}: {size}")
             if size > 0:
-                subsizes = _subtree_sizes_output(subtree, subtree_name)
                 lines.append(textwrap.indent(subsizes, "    "))
         else:
-            lines.append(f"*{subtree.name}: {subtree.total_size()}")
-    return "\n".join(lines)
+            size = subtree.total_size()
+            lines.append(f"*{subtree.name}: {size}")
+        total += size
+    return "\n".join(lines), total
 
 
 if __name__ == "__main__":
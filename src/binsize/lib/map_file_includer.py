@@ -6,30 +6,65 @@ It should cover at least some of the mysterious data.
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Sequence
 
 from .api import DataRow, MapFileIncluderAPI
 from .map_file_analyzer import get_section_data
 
+# How many characters of the Rust symbol hash are compared
+RUST_HASH_LENGTH = 9
+
+
+@dataclass
+class RowIndex:
+    """Lookups into the row data, built in one pass and kept up to date."""
+
+    # Symbol names of rows in each section
+    section_symbols: dict[str, set[str]] = field(default_factory=dict)
+    # Endings of all the symbols, to quickly look up the Rust hashes
+    symbol_ends: set[str] = field(default_factory=set)
+    # The "mysterious" section rows (the first of possibly duplicated symbols)
+    section_rows: dict[str, DataRow] = field(default_factory=dict)
+
+    @classmethod
+    def from_rows(cls, row_data: list[DataRow]) -> RowIndex:
+        index = cls()
+        index.add_rows(row_data)
+        return index
+
+    def add_rows(self, rows: list[DataRow]) -> None:
+        for row in rows:
+            symbol_name = row.symbol_name
+            self.section_symbols.setdefault(row.section, set()).add(symbol_name)
+            self.symbol_ends.add(symbol_name[-RUST_HASH_LENGTH:])
+            if symbol_name.startswith("[section "):
+                self.section_rows.setdefault(symbol_name, row)
+
 
 class MapFileIncluder(MapFileIncluderAPI):
     def add_info(
         self, row_data: list[DataRow], map_file: str | Path, sections: Sequence[str]
     ) -> list[DataRow]:
+        # Going through all the rows only once, not for every section
+        index = RowIndex.from_rows(row_data)
+
         # Adding the info one section at a time
         for section in sections:
             map_symbol_sizes = get_symbol_sizes(map_file, section)
             map_symbols_we_miss = get_symbols_we_miss(
-                row_data, map_symbol_sizes, section
+                row_data, map_symbol_sizes, section, index
             )
+            rows_before = len(row_data)
             added_size = add_map_file_info(
                 row_data, map_symbol_sizes, map_symbols_we_miss, section
             )
+            index.add_rows(row_data[rows_before:])
 
             print(f"Added {added_size:_} bytes to {section} section from {map_file}")
 
-            decrease_size_of_mysterious_section(row_data, section, added_size)
+            decrease_size_of_mysterious_section(index.section_rows, section, added_size)
 
         return row_data
 
@@ -51,10 +86,15 @@ def get_symbol_sizes(map_file: str | Path, section: str) -> dict[str, int]:
 
 
 def get_symbols_we_miss(
-    row_data: list[DataRow], map_symbol_sizes: dict[str, int], section: str
+    row_data: list[DataRow],
+    map_symbol_sizes: dict[str, int],
+    section: str,
+    index: RowIndex | None = None,
 ) -> set[str]:
-    our_symbols = set(row.symbol_name for row in row_data if row.section == section)
-    map_symbols = set(symbol for symbol in map_symbol_sizes.keys())
+    if index is None:
+        index = RowIndex.from_rows(row_data)
+    our_symbols = index.section_symbols.get(section, set())
+    our_symbol_ends = index.symbol_ends
 
     def _is_duplicate_rust_symbol(map_s: str) -> bool:
         # Rust symbols look little different in bloaty and map file
@@ -64,20 +104,15 @@ def get_symbols_we_miss(
         if not (map_s.startswith("_ZN") and map_s.endswith("E")):
             return False
 
-        end_hash = map_s[-10:-1]
-        for row in row_data:
-            if row.symbol_name.endswith(end_hash):
-                return True
-        return False
+        end_hash = map_s[-(RUST_HASH_LENGTH + 1) : -1]
+        return end_hash in our_symbol_ends
 
-    def _symbol_is_missing(map_s: str) -> bool:
-        if map_s in our_symbols:
-            return False
-        if _is_duplicate_rust_symbol(map_s):
-            return False
-        return True
-
-    return {map_s for map_s in map_symbols if _symbol_is_missing(map_s)}
+    # Hashed set difference first, only the rest is checked for Rust duplicates
+    return {
+        map_s
+        for map_s in map_symbol_sizes.keys() - our_symbols
+        if not _is_duplicate_rust_symbol(map_s)
+    }
 
 
 def add_map_file_info(
@@ -86,30 +121,27 @@ def add_map_file_info(
     map_symbols_we_miss: set[str],
     section: str,
 ) -> int:
-    added_size = 0
-    for missing_symbol in map_symbols_we_miss:
-        symbol_size = map_symbol_sizes[missing_symbol]
-        row_data.append(
-            DataRow(
-                symbol_name=missing_symbol,
-                section=section,
-                size=symbol_size,
-            )
+    new_rows = [
+        DataRow(
+            symbol_name=missing_symbol,
+            section=section,
+            size=map_symbol_sizes[missing_symbol],
         )
-        added_size += symbol_size
+        for missing_symbol in map_symbols_we_miss
+    ]
+    row_data.extend(new_rows)
 
-    return added_size
+    return sum(row.size for row in new_rows)
 
 
 def decrease_size_of_mysterious_section(
-    row_data: list[DataRow], section: str, added_size: int
+    section_rows: dict[str, DataRow], section: str, added_size: int
 ) -> None:
     # Decreasing the "mysterious" symbol data by what we have added
     section_symbol = f"[section {section}]"
-    for row in row_data:
-        if row.symbol_name == section_symbol:
-            row.size -= added_size
-            print(f"Decreasing the size of `{section_symbol}` by {added_size:_} bytes")
-            break
+    row = section_rows.get(section_symbol)
+    if row is not None:
+        row.size -= added_size
+        print(f"Decreasing the size of `{section_symbol}` by {added_size:_} bytes")
     else:
         print(f"WARNING: could not decrease the size of `{section_symbol}`")
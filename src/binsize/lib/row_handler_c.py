@@ -4,11 +4,15 @@ Defining handler logic for the C rows.
 
 from __future__ import annotations
 
+import fnmatch
+import itertools
+import linecache
 import re
 import subprocess
-from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from .. import settings
 from ..user_data import cache_dir
@@ -22,12 +26,54 @@ if TYPE_CHECKING:  # pragma: no cover
 
 ROOT = str(settings.ROOT_DIR) + "/"
 
+WORD_RE = re.compile(r"\w+")
+OUTLINED_FUNCTION_RE = re.compile(r"^OUTLINED_FUNCTION_\d+$")
+UNNAMED_RODATA_RE = re.compile(r"^.rodata::L__unnamed_\d+$")
+SPACE_PARENTHESIS_RE = re.compile(r"^ *?\(")
+
+# Words (shell-style patterns) that can appear before a symbol in its definition
+DEF_PATTERN_WORDS = [
+    "static",
+    "const",
+    "void",
+    "bool",
+    "char",
+    "char*",  # how to escape the asterisk? it should be literal
+    "secbool",
+    "float",
+    "uint*",
+    "int*",
+    "__int*",
+    "mp_obj_t",
+    "mp_*",
+    "size_t",
+    "qstr",
+    "STATIC",
+    "FRESULT",
+    "DRESULT",
+    "DWORD",
+    "*TypeDef",
+    "*RETURN",
+]
+# All of them at once, not to try them one by one for every word
+DEF_PATTERN_WORDS_RE = re.compile(
+    "|".join(fnmatch.translate(pattern) for pattern in DEF_PATTERN_WORDS)
+)
+
 
 class CRow(CommonRow):
     language = "C"
 
     def __init__(self, source_def_cache: SourceDefinitionCache | None = None) -> None:
         super().__init__(source_def_cache)
+        # More symbols can have the same name after the cleaning
+        # (e.g. "xxx.constprop.0" and "xxx.part.1"), searching only once
+        # (cleaned symbol name -> definition)
+        self._definitions: dict[str, str] = {}
+        # Lines mentioning the symbols, searched for in advance for the rows
+        # of the latest `prefetch_definitions()`
+        # (symbol name -> grep output lines, in the same format as from a single grep)
+        self._symbol_lines: dict[str, list[str]] = {}
 
     def _is_data(self, row: DataRow) -> bool:
         """Checking whether this row contains data or logic."""
@@ -38,15 +84,42 @@ class CRow(CommonRow):
         # Just cleaning some names that are known to have number suffixes in them
         return "", clean_special_symbols(symbol_name)
 
+    def prefetch_definitions(self, rows: list[DataRow]) -> None:
+        # Searching for all the symbols in one go, not running grep for each of them
+        symbol_names: list[str] = []
+        for row in rows:
+            if self._is_special_symbol(row) or self._has_source_build_definition(row):
+                continue
+            # Already known from the previous runs (the rare invalidated
+            # definitions will be searched for one by one)
+            if (
+                self.source_def_cache is not None
+                and self.source_def_cache.get(row.symbol_name) is not None
+            ):
+                continue
+            if row.language:
+                symbol_names.append(row.func_name)
+            else:
+                symbol_names.append(self._get_module_and_function(row.symbol_name)[1])
+        self._symbol_lines = prefetch_symbol_lines(symbol_names)
+
     def _get_definition(self, row: DataRow) -> str:
         symbol_name = row.func_name
+        result = self._definitions.get(symbol_name)
+        if result is None:
+            result = self._find_definition(symbol_name)
+            self._definitions[symbol_name] = result
+        return result
 
+    def _find_definition(self, symbol_name: str) -> str:
         # We might not find the definition, so have at least some idea of where it lives
-        really_existing_definition = get_existing_definition(symbol_name)
+        really_existing_definition = get_existing_definition(
+            symbol_name, symbol_lines=self._symbol_lines
+        )
         if really_existing_definition:
             result = really_existing_definition
         else:
-            result = get_default_definition(symbol_name)
+            result = get_default_definition(symbol_name, self._symbol_lines)
 
         # Sanitating the path to be relative to the root dir
         if ROOT in result:
@@ -66,21 +139,18 @@ def is_data_cached(build_definition: str) -> bool:
 
     # Looking at the definition line number and asking
     # Is there a "const" keyword before any declaration?
-    with open(def_file_path, "r") as f:
-        for i, line in enumerate(f, start=1):
-            if i == int(line_num):
-                return "const " in line.split("(")[0]
-
-    return False
+    # (`linecache` keeps the file lines, many symbols are defined in the same file)
+    line = linecache.getline(str(def_file_path), int(line_num))
+    return "const " in line.split("(")[0]
 
 
 def clean_special_symbols(symbol_name: str) -> str:
     if symbol_name.startswith("[section"):
         return symbol_name
 
-    if re.match(r"^OUTLINED_FUNCTION_\d+$", symbol_name):
+    if OUTLINED_FUNCTION_RE.match(symbol_name):
         return "OUTLINED_FUNCTION"
-    if re.match(r"^.rodata::L__unnamed_\d+$", symbol_name):
+    if UNNAMED_RODATA_RE.match(symbol_name):
         return ".rodata::L__unnamed"
 
     # Not interested in the part after dot
@@ -90,41 +160,99 @@ def clean_special_symbols(symbol_name: str) -> str:
     return symbol_name
 
 
-def get_existing_definition(symbol_name: str, accept_declaration: bool = False) -> str:
+def get_existing_definition(
+    symbol_name: str,
+    accept_declaration: bool = False,
+    symbol_lines: dict[str, list[str]] | None = None,
+) -> str:
 
     # e.g. groestl_big_close.constprop.0 -> groestl_big_close
     if "." in symbol_name:
         symbol_name = symbol_name.split(".")[0]
 
-    # First we grep all the possible occurrences of the symbol name
-    # and only then process them more further
-    to_search = rf"\b{symbol_name}\b"
+    grep_lines = symbol_lines.get(symbol_name) if symbol_lines else None
+    if grep_lines is None:
+        grep_lines = grep_symbol_lines(symbol_name)
+    elif symbol_name.startswith("mod_trezor"):
+        # Prefetched from all the places, these are only searched in extmod
+        extmod_prefix = f"{settings.ROOT_DIR / 'embed' / 'extmod'}/"
+        grep_lines = [line for line in grep_lines if line.startswith(extmod_prefix)]
 
+    return find_definition_in_lines(symbol_name, grep_lines, accept_declaration)
+
+
+def get_dirs_to_search(symbol_name: str) -> list[Path]:
     if symbol_name.startswith("mod_trezor"):
-        where_to_search = settings.ROOT_DIR / "embed" / "extmod"
+        return [settings.ROOT_DIR / "embed" / "extmod"]
     else:
-        where_to_search = (
-            f'{settings.ROOT_DIR / "vendor"} {settings.ROOT_DIR / "embed"}'
-        )
+        return [settings.ROOT_DIR / "vendor", settings.ROOT_DIR / "embed"]
+
+
+# Definition and declaration are searched for in the same lines, one after another
+@lru_cache(maxsize=256)
+def grep_symbol_lines(symbol_name: str) -> list[str]:
+    # First we grep all the possible occurrences of the symbol name
+    # and only then process them more further
+    to_search = rf"\b{symbol_name}\b"
 
     # Important to use "-R" instead of "-r", as vendor contains only symlinks
-    cmd = (
-        rf'grep -R -P -n0 --include \*.h --include \*.c "{to_search}" {where_to_search}'
-    )
+    cmd = ["grep", "-R", "-P", "-n", "--include=*.h", "--include=*.c", to_search]
+    cmd.extend(str(path) for path in get_dirs_to_search(symbol_name))
 
     grep_result = subprocess.run(
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.DEVNULL,
         text=True,
-        shell=True,
-    ).stdout.strip()
+    ).stdout
 
-    if not grep_result or len(grep_result.split(":")) < 3:
-        return ""
-    else:
-        grep_lines = [line for line in grep_result.split("\n") if symbol_name in line]
-        return find_definition_in_lines(symbol_name, grep_lines, accept_declaration)
+    return [line for line in grep_result.splitlines() if symbol_name in line]
+
+
+def prefetch_symbol_lines(symbol_names: Iterable[str]) -> dict[str, list[str]]:
+    """Grep for all the symbols at once, walking the directories only once.
+
+    get_existing_definition() then uses these results instead of running grep.
+    """
+    symbols: set[str] = set()
+    for symbol_name in symbol_names:
+        symbol_name = symbol_name.split(".")[0]
+        # Fixed-string word search is the same as "\b...\b" only for plain words
+        if WORD_RE.fullmatch(symbol_name):
+            symbols.add(symbol_name)
+    if not symbols:
+        return {}
+
+    # All the places, "embed" also covers the "embed/extmod"
+    # grep is single-threaded, so searching the directories in parallel,
+    # keeping the results in the same order as from one grep over both
+    dirs_to_search = [settings.ROOT_DIR / "vendor", settings.ROOT_DIR / "embed"]
+    patterns = "\n".join(symbols)
+    with ThreadPoolExecutor(max_workers=len(dirs_to_search)) as executor:
+        dir_results = list(executor.map(partial(grep_words, patterns), dirs_to_search))
+
+    symbol_lines: dict[str, list[str]] = {symbol: [] for symbol in symbols}
+    for line in itertools.chain.from_iterable(dir_results):
+        line_content = line.split(":", maxsplit=2)[-1]
+        for symbol in symbols.intersection(WORD_RE.findall(line_content)):
+            symbol_lines[symbol].append(line)
+
+    return symbol_lines
+
+
+def grep_words(patterns: str, dir_to_search: Path) -> list[str]:
+    """Lines containing any of the newline-separated words, in grep format."""
+    cmd = ["grep", "-R", "-n", "-w", "-F", "--include=*.h", "--include=*.c"]
+    cmd.extend(["-f", "-", str(dir_to_search)])  # patterns from stdin
+
+    return subprocess.run(
+        cmd,
+        input=patterns,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+    ).stdout.splitlines()
 
 
 def find_definition_in_lines(
@@ -146,7 +274,10 @@ def validate_line_for_definition(
     # we can reuse otherwise same logic for both definition and declaration
 
     line_content = line_content.strip()
-    after_symbols = line_content.split(symbol_name, maxsplit=1)[-1]
+    # Splitting the line only once, without the symbol it stays whole on both sides
+    before_symbols, symbol_found, after_symbols = line_content.partition(symbol_name)
+    if not symbol_found:
+        after_symbols = before_symbols
 
     if symbol_name.startswith("Font_Roboto"):
         return "const" in line_content
@@ -166,12 +297,10 @@ def validate_line_for_definition(
         return True
 
     if not accept_declaration:
-        if not after_symbols.startswith(("[", "(", " =")) and not re.match(
-            r"^ *?\(", after_symbols
-        ):
-            return False
+        if not after_symbols.startswith(("[", "(", " =")):
+            if not SPACE_PARENTHESIS_RE.match(after_symbols):
+                return False
 
-    before_symbols = line_content.split(symbol_name, maxsplit=1)[0]
     if "," in before_symbols:
         return False
     if "ALIGN" not in before_symbols and "(" in before_symbols:
@@ -179,44 +308,23 @@ def validate_line_for_definition(
 
     before_symbols_words = before_symbols.split()
 
-    def_pattern_words = [
-        "static",
-        "const",
-        "void",
-        "bool",
-        "char",
-        "char*",  # how to escape the asterisk? it should be literal
-        "secbool",
-        "float",
-        "uint*",
-        "int*",
-        "__int*",
-        "mp_obj_t",
-        "mp_*",
-        "size_t",
-        "qstr",
-        "STATIC",
-        "FRESULT",
-        "DRESULT",
-        "DWORD",
-        "*TypeDef",
-        "*RETURN",
-    ]
-    if "_context" in symbol_name:
-        def_pattern_words.append("secp256k1_context")
-
     for word in before_symbols_words:
-        for def_pattern in def_pattern_words:
-            if fnmatch(word, def_pattern):
-                return True
+        if DEF_PATTERN_WORDS_RE.match(word):
+            return True
+        if word == "secp256k1_context" and "_context" in symbol_name:
+            return True
 
     return False
 
 
-def get_default_definition(symbol_name: str) -> str:
+def get_default_definition(
+    symbol_name: str, symbol_lines: dict[str, list[str]] | None = None
+) -> str:
     # When definition was not found, look at least for a declaration
     # In this case, not specifying the exact line (to also differentiate it)
-    possible_declaration = get_existing_definition(symbol_name, accept_declaration=True)
+    possible_declaration = get_existing_definition(
+        symbol_name, accept_declaration=True, symbol_lines=symbol_lines
+    )
     if possible_declaration:
         # Stripping the line number
         return possible_declaration.split(":")[0]
@@ -231,22 +339,29 @@ def get_default_definition(symbol_name: str) -> str:
         if mod_mp_result:
             return mod_mp_result
 
-    vendor = find_at_least_something(symbol_name, settings.ROOT_DIR / "vendor")
-    if vendor:
-        return vendor
-
-    return find_at_least_something(symbol_name, settings.ROOT_DIR / "embed")
+    # Vendor first, then embed - grep is listing the files in this order
+    return find_at_least_something(
+        symbol_name, settings.ROOT_DIR / "vendor", settings.ROOT_DIR / "embed"
+    )
 
 
-def find_at_least_something(symbol_name: str, dir_to_search: str | Path) -> str:
-    cmd = rf'grep -R -P -l --include \*.h --include \*.c "\b{symbol_name}" {dir_to_search}'
+def find_at_least_something(symbol_name: str, *dirs_to_search: str | Path) -> str:
+    cmd = [
+        "grep",
+        "-R",
+        "-P",
+        "-l",
+        "--include=*.h",
+        "--include=*.c",
+        rf"\b{symbol_name}",
+    ]
+    cmd.extend(str(dir_to_search) for dir_to_search in dirs_to_search)
 
     grep_result = subprocess.run(
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.DEVNULL,
         text=True,
-        shell=True,
     ).stdout.strip()
 
     if not grep_result:
@@ -44,19 +44,24 @@ class CommonRow(RowHandlerAPI):
     """
 
     language = "Common language"
+    # Parts of symbol names which are always data (string literals, read-only data)
+    data_markers: tuple[str, ...] = ("str1.1", ".rodata")
 
     def __init__(
         self, source_def_cache: SourceDefinitionCacheAPI | None = None
     ) -> None:
         self.source_def_cache = source_def_cache
+        # Many rows come from the same module, so they can share the same string
+        self._module_names: dict[str, str] = {}
 
     def add_basic_info(self, row: DataRow) -> DataRow:
         row.language = "" if row.symbol_name.startswith("[section") else self.language
-        row.module_name, row.func_name = self._get_module_and_function(row.symbol_name)
+        module_name, row.func_name = self._get_module_and_function(row.symbol_name)
+        row.module_name = self._module_names.setdefault(module_name, module_name)
 
         # Differentiating between logic and data
         # There are some special cases which we know are data
-        if "str1.1" in row.symbol_name or ".rodata" in row.symbol_name:
+        if any(marker in row.symbol_name for marker in self.data_markers):
             row.data_size = row.size
         elif self._is_data(row):
             row.data_size = row.size
@@ -67,31 +72,44 @@ class CommonRow(RowHandlerAPI):
 
     def add_definition(self, row: DataRow) -> DataRow:
         # In case row is missing a basic info, add it first
-        if not row.language:
+        # ("[section" rows have no language even with the basic info,
+        # but always have the function name)
+        if not row.language and not row.func_name:
             row = self.add_basic_info(row)
 
+        if self._is_special_symbol(row):
+            return row
+
+        # Fast path - valid build definition does not need any lookups
+        if self._has_source_build_definition(row):
+            row.source_definition = row.build_definition
+            return row
+
+        row.source_definition = self._get_definition_cached(row)
+        return row
+
+    def prefetch_definitions(self, rows: list[DataRow]) -> None:
+        """Prepare for add_definition() being called on all these rows.
+
+        Place for handlers that can look up many definitions at once
+        quicker than one by one. Nothing to do by default.
+        """
+
+    @staticmethod
+    def _is_special_symbol(row: DataRow) -> bool:
         # Some special symbols do not need/have definition
         # e.g. [section .flash], .bootloader and other special symbols
-        if (
-            row.symbol_name.startswith("[")
-            or row.symbol_name.startswith(".")
-            or row.symbol_name.startswith("str1")
-            or not row.symbol_name
-        ):
-            return row
+        return not row.symbol_name or row.symbol_name.startswith(("[", ".", "str1"))
 
+    @staticmethod
+    def _has_source_build_definition(row: DataRow) -> bool:
         # Taking the source definition from the build definition, if
         # it is already there and is a valid source - not coming from build
         # (applicable for most of the C files)
-        if (
-            row.build_definition
+        return (
+            bool(row.build_definition)
             and "build/firmware/frozen_mpy.c" not in row.build_definition
-        ):
-            row.source_definition = row.build_definition
-        else:
-            row.source_definition = self._get_definition_cached(row)
-
-        return row
+        )
 
     def _get_definition_cached(self, row: DataRow) -> str:
         if self.source_def_cache is not None:
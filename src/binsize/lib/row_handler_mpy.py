@@ -5,19 +5,62 @@ Defining handler logic for the micropython rows.
 from __future__ import annotations
 
 import ast
+import hashlib
+import os
+import pickle
 import re
-from dataclasses import dataclass
+import tempfile
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from .. import settings
+from ..user_data import cache_dir
 from .row_handler_common import INVALID_FILE_PREFIX, MPY_PREFIXES, CommonRow
 
 if TYPE_CHECKING:  # pragma: no cover
     from .api import DataRow
     from .source_definition_cache import SourceDefinitionCache
 
+# Parsed module definitions, so that the modules do not need to be parsed every run
+MODULE_DEFINITIONS_CACHE_DIR = cache_dir / "mpy_module_definitions"
+# To be changed whenever the ObjectDefinition changes, invalidating the cache
+MODULE_DEFINITIONS_VERSION = 3
+
+NUMBER_SUFFIX_RE = re.compile(r"_\d+$")
+# Symbols where the number at the end is really part of the name
+NUMBER_SUFFIX_EXCEPTIONS = (
+    "blake_hash_writer_32",
+    "_migrate_from_version_01",
+    "sha256d_32",
+    "groestl512d_32",
+    "blake256d_32",
+    "keccak_32",
+    "ripemd160_32",
+)
+STRANGE_SUFFIX_RE = re.compile(r"(_)?_lt_\w+_gt(_\d*)?")
+# Stripping the prefixes in their order, each of them only when present -
+# one match instead of a `startswith` call for every prefix
+MPY_PREFIXES_RE = re.compile("".join(f"(?:{re.escape(p)})?" for p in MPY_PREFIXES))
+
+
+@dataclass
+class NamePrefixNode:
+    """Node of a tree of (class and function) names split into parts."""
+
+    children: dict[str, NamePrefixNode] = field(default_factory=dict)
+    # Whether some name ends here
+    is_class: bool = False
+    is_func: bool = False
+
+    def insert(self, name_parts: list[str]) -> NamePrefixNode:
+        """Add the name into the tree, returning its last node."""
+        node = self
+        for part in name_parts:
+            node = node.children.setdefault(part, NamePrefixNode())
+        return node
+
 
 @dataclass
 class ObjectDefinition:
@@ -34,10 +77,31 @@ class ObjectDefinition:
     start_line: int
     end_line: int
 
+    # Objects by their names, for quick lookups (the first one wins, as in the lists)
+    _class_map: dict[str, ObjectDefinition] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _func_map: dict[str, ObjectDefinition] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    # Tree of the names split by "_", to find the longest name matching the symbol
+    _name_prefixes: NamePrefixNode = field(
+        default_factory=NamePrefixNode, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        for cls in self.classes:
+            self._class_map.setdefault(cls.name, cls)
+            self._name_prefixes.insert(cls.name.split("_")).is_class = True
+        for func in self.functions:
+            self._func_map.setdefault(func.name, func)
+            self._name_prefixes.insert(func.name.split("_")).is_func = True
+
     # Classes interaction
     def has_top_level_class(self, cls_name: str) -> bool:
         """Check if given class name is a top-level class."""
-        return cls_name in self.class_names()
+        return cls_name in self._class_map
 
     def class_names(self) -> list[str]:
         """Return all class names at this level."""
@@ -45,15 +109,12 @@ class ObjectDefinition:
 
     def get_class(self, cls_name: str) -> ObjectDefinition | None:
         """Return class definition if it exists."""
-        for cls in self.classes:
-            if cls.name == cls_name:
-                return cls
-        return None
+        return self._class_map.get(cls_name)
 
     # Functions interaction
     def has_top_level_func(self, func_name: str) -> bool:
         """Check if given func name is a top-level function."""
-        return func_name in self.func_names()
+        return func_name in self._func_map
 
     def func_names(self) -> list[str]:
         """Return all function names at this level."""
@@ -61,16 +122,13 @@ class ObjectDefinition:
 
     def get_func(self, func_name: str) -> ObjectDefinition | None:
         """Return function definition if it exists."""
-        for func in self.functions:
-            if func.name == func_name:
-                return func
-        return None
+        return self._func_map.get(func_name)
 
     # Symbol resolving
     def resolve_symbol(self, symbol_name: str) -> str:
         """Get the function name of the symbol"""
         # First trying to match the top-level functions
-        if symbol_name in self.func_names():
+        if symbol_name in self._func_map:
             return f"{symbol_name}()"
 
         # When not found, we need to find some combinations of
@@ -86,25 +144,35 @@ class ObjectDefinition:
         # NOT resolving the function completely, just returning the
         # most top-level one (not to have so many individual objects)
 
+        # Walking the names split the same way, remembering the longest matches
+        longest_class = longest_func = 0
+        node = self._name_prefixes
+        for i, part in enumerate(symbol_split, start=1):
+            next_node = node.children.get(part)
+            if next_node is None:
+                break
+            node = next_node
+            if node.is_class:
+                longest_class = i
+            if node.is_func:
+                longest_func = i
+
         # Look into classes
-        for i in range(len(symbol_split), 0, -1):
-            class_try = "_".join(symbol_split[:i])
-            if self.has_top_level_class(class_try):
-                rest_of_symbol = "_".join(symbol_split[i:])
-                new_class_object = self.get_class(class_try)
-                assert new_class_object is not None
-                new_resolved_symbol = new_class_object.resolve_symbol(rest_of_symbol)
-                # Not generating a trailing dot when nothing follows
-                if new_resolved_symbol:
-                    return f"{class_try}.{new_resolved_symbol}"
-                else:
-                    return class_try
+        if longest_class:
+            class_try = "_".join(symbol_split[:longest_class])
+            rest_of_symbol = "_".join(symbol_split[longest_class:])
+            new_class_object = self._class_map[class_try]
+            new_resolved_symbol = new_class_object.resolve_symbol(rest_of_symbol)
+            # Not generating a trailing dot when nothing follows
+            if new_resolved_symbol:
+                return f"{class_try}.{new_resolved_symbol}"
+            else:
+                return class_try
 
         # Look into functions
-        for i in range(len(symbol_split), 0, -1):
-            func_try = "_".join(symbol_split[:i])
-            if self.has_top_level_func(func_try):
-                return f"{func_try}()"
+        if longest_func:
+            func_try = "_".join(symbol_split[:longest_func])
+            return f"{func_try}()"
 
         return ""
 
@@ -115,17 +183,16 @@ class ObjectDefinition:
         # so checking for the objects and functions
         # Returning when done iterating through all substrings
         # Returning 0 on any mismatch as a sign of error
-        current_object = self
+        # (one lookup per name, the maps answer both "is it there" and "what is it")
+        current_object: ObjectDefinition | None = self
         for symbol in func_name.split("."):
             assert current_object is not None
             if symbol.endswith("()"):
-                if not current_object.has_top_level_func(symbol[:-2]):
-                    return 0
-                current_object = current_object.get_func(symbol[:-2])
+                current_object = current_object._func_map.get(symbol[:-2])
             else:
-                if not current_object.has_top_level_class(symbol):
-                    return 0
-                current_object = current_object.get_class(symbol)
+                current_object = current_object._class_map.get(symbol)
+            if current_object is None:
+                return 0
 
         assert current_object is not None
         return current_object.start_line
@@ -133,6 +200,9 @@ class ObjectDefinition:
 
 class MicropythonRow(CommonRow):
     language = "mpy"
+    # Frozen module symbols are plain identifiers (selected by MPY_PREFIXES),
+    # they never contain the dotted section markers
+    data_markers = ()
 
     def __init__(self, source_def_cache: SourceDefinitionCache | None = None) -> None:
         super().__init__(source_def_cache)
@@ -143,22 +213,13 @@ class MicropythonRow(CommonRow):
         return row.symbol_name.startswith("const_obj_")
 
     def _get_module_and_function(self, symbol_name: str) -> tuple[str, str]:
-        for prefix in MPY_PREFIXES:
-            if symbol_name.startswith(prefix):
-                symbol_name = symbol_name[len(prefix) :]
+        prefixes_match = MPY_PREFIXES_RE.match(symbol_name)
+        if prefixes_match:
+            symbol_name = symbol_name[prefixes_match.end() :]
 
         # There are possible numbers at the end, delete them, unless it really is there
-        exceptions = [
-            "blake_hash_writer_32",
-            "_migrate_from_version_01",
-            "sha256d_32",
-            "groestl512d_32",
-            "blake256d_32",
-            "keccak_32",
-            "ripemd160_32",
-        ]
-        if not any(symbol_name.endswith(ex) for ex in exceptions):
-            symbol_name = re.sub(r"_\d+$", "", symbol_name)
+        if not symbol_name.endswith(NUMBER_SUFFIX_EXCEPTIONS):
+            symbol_name = NUMBER_SUFFIX_RE.sub("", symbol_name)
 
         module_end = "__lt_module_gt_"
         if symbol_name.endswith(module_end):
@@ -171,10 +232,11 @@ class MicropythonRow(CommonRow):
             split_symbol = symbol_name.split("_")
             for i in range(len(split_symbol), 0, -1):
                 module_part = "_".join(split_symbol[:i])
-                func_part = "_".join(split_symbol[i:])
                 module_name, module_is_valid = resolve_module(module_part)
-                func_name = resolve_function_name(func_part, module_name)
                 if module_is_valid:
+                    # Function is only resolved in the module found
+                    func_part = "_".join(split_symbol[i:])
+                    func_name = resolve_function_name(func_part, module_name)
                     break
             else:
                 module_is_valid = False
@@ -208,30 +270,82 @@ def resolve_function_name(func_name: str, module_name: str) -> str:
 
 
 def remove_strange_suffixes(symbol_name: str) -> str:
-    return re.sub(r"(_)?_lt_\w+_gt(_\d*)?", "", symbol_name)
+    # Most of the symbols have nothing like that, and the regex is slow on them
+    if "_lt_" not in symbol_name:
+        return symbol_name
+    return STRANGE_SUFFIX_RE.sub("", symbol_name)
 
 
 @lru_cache(maxsize=None)
 def get_module_object_definitions(
     module_path: str | Path,
 ) -> ObjectDefinition:
-    """Get all the functions and classes defined in a given module"""
+    """Get all the functions and classes defined in a given module.
+
+    Parsing the module is expensive, so the result is also cached on disk
+    until the module file changes.
+    The result is shared by all the callers, it must not be modified.
+    """
+    file_path = Path(settings.ROOT_DIR / module_path)
+    if not file_path.is_file():
+        return parse_module_object_definitions(module_path)
+    stat = file_path.stat()
+    file_stamp = f"{MODULE_DEFINITIONS_VERSION}_{stat.st_mtime_ns}_{stat.st_size}"
+
+    # Absolute path, so that more firmware checkouts do not overwrite each other
+    path_hash = hashlib.sha1(str(file_path.resolve()).encode()).hexdigest()
+    cache_file = MODULE_DEFINITIONS_CACHE_DIR / f"{path_hash}.pickle"
+    try:
+        with open(cache_file, "rb") as f:
+            cached_stamp, cached_definitions = pickle.load(f)
+        if cached_stamp == file_stamp:
+            return cached_definitions
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    definitions = parse_module_object_definitions(module_path)
+    # Not being able to cache them does not make the definitions invalid
+    try:
+        save_cache_file(cache_file, (file_stamp, definitions))
+    except OSError:
+        pass
+    return definitions
+
+
+def save_cache_file(cache_file: Path, content: object) -> None:
+    """Pickle the content into the file, without anyone seeing it half-written.
+
+    Writing to a unique temporary file first, as other threads or runs
+    could be saving the same file at the same time.
+    """
+    cache_file.parent.mkdir(exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def parse_module_object_definitions(module_path: str | Path) -> ObjectDefinition:
+    """Get all the functions and classes defined in a given module from its AST"""
 
     def _resolve_object(
         main_node: ast.Module | ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef,
         file_name: str | None = None,
     ) -> ObjectDefinition:
         """Recursively resolve object definitions from the AST"""
-        functions = [
-            _resolve_object(node)
-            for node in main_node.body
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
-        ]
-        classes = [
-            _resolve_object(node)
-            for node in main_node.body
-            if isinstance(node, ast.ClassDef)
-        ]
+        # Only the direct children of interest are visited, in one pass,
+        # not the whole subtree (statements, expressions) of each body
+        functions: list[ObjectDefinition] = []
+        classes: list[ObjectDefinition] = []
+        for node in main_node.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                functions.append(_resolve_object(node))
+            elif isinstance(node, ast.ClassDef):
+                classes.append(_resolve_object(node))
 
         return ObjectDefinition(
             name=str(file_name)
@@ -257,7 +371,8 @@ def get_module_object_definitions(
     if not Path(settings.ROOT_DIR / module_path).is_file():
         return _default_object()
 
-    with open(settings.ROOT_DIR / module_path) as file:
+    # Bytes are decoded by the parser itself, saving one copy of the source
+    with open(settings.ROOT_DIR / module_path, "rb") as file:
         # Protecting against a possible file corruption
         try:
             parsed_ast = ast.parse(file.read())
@@ -292,7 +407,7 @@ def resolve_module(module_name: str) -> tuple[str, bool]:
         else:
             possible_path = Path(f"{file_path}/{part}")
 
-        if (settings.ROOT_DIR / possible_path).exists():
+        if path_exists(possible_path):
             file_path = str(possible_path)
         else:
             file_path = f"{possible_path}_"
@@ -302,13 +417,30 @@ def resolve_module(module_name: str) -> tuple[str, bool]:
     # Special case for src/apps/monero/xmr, where both "serialize" and "serialize_message"
     # are both valid directories
     if (
-        not Path(settings.ROOT_DIR / file_path).exists()
+        not path_exists(Path(file_path))
         and "apps/monero/" in file_path
         and "serialize/messages" in file_path
     ):
         file_path = file_path.replace("serialize/messages_", "serialize_messages/")
 
     # It may happen that the file does not exist - it may not even be a python file
-    is_valid = Path(settings.ROOT_DIR / file_path).exists()
+    is_valid = path_exists(Path(file_path))
 
     return file_path, is_valid
+
+
+def path_exists(path: Path) -> bool:
+    """Whether the path exists in the root dir.
+
+    Quicker than `.exists()` - there are many candidates in the same
+    directories, and each directory is listed only once.
+    """
+    return path.name in get_dir_entries(settings.ROOT_DIR / path.parent)
+
+
+@lru_cache(maxsize=None)
+def get_dir_entries(dir_path: Path) -> frozenset[str]:
+    try:
+        return frozenset(os.listdir(dir_path))
+    except OSError:
+        return frozenset()
@@ -5,7 +5,7 @@ Defining handler logic for the Rust rows.
 from __future__ import annotations
 
 import re
-import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -16,6 +16,20 @@ if TYPE_CHECKING:  # pragma: no cover
     from .api import DataRow
     from .source_definition_cache import SourceDefinitionCache
 
+# ".." is the only key without a "$" - the fast path in
+# replace_dollar_encodings() relies on it
+DOLLAR_REPLACEMENTS = {
+    "$LT$": "<",
+    "$GT$": ">",
+    "$RF$": "&",
+    "$C$": ",",
+    "..": "::",
+}
+UNICODE_ENCODING_RE = re.compile(r"\$u(\w\w)\$")
+HEX_RE = re.compile(r"[0-9a-fA-F]+")
+FN_DEFINITION_RE = re.compile(rb"fn (\w+)[(<]")
+PLAIN_FN_NAME_RE = re.compile(r"[A-Za-z0-9_]+")
+
 
 class RustRow(CommonRow):
     language = "Rust"
@@ -109,45 +123,70 @@ def resolve_trezorlib_symbol(symbol_name: str) -> tuple[str, str]:
 
 
 def get_line_num(module_name: str, func_name: str) -> str:
-    module_location = settings.ROOT_DIR / module_name
+    module_path = settings.ROOT_DIR / module_name
     func_name = func_name.replace("()", "").split("::")[-1]
 
-    to_search = f"fn {func_name}[(<]"
-    cmd = f'grep -m1 -n0 "{to_search}" {module_location} | cut -d: -f1'
-
-    result = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.DEVNULL,
-        text=True,
-        shell=True,
-    ).stdout.strip()
-    return result
+    # Plain identifiers are looked up in the per-module index,
+    # anything else (e.g. non-ASCII names) needs its own search
+    if PLAIN_FN_NAME_RE.fullmatch(func_name):
+        line_num = get_fn_line_nums(module_path).get(func_name)
+        return str(line_num) if line_num else ""
+
+    module_content = get_file_content(module_path)
+    to_search = re.compile(rf"fn {re.escape(func_name)}[(<]".encode())
+    match = to_search.search(module_content)
+    if match is None:
+        return ""
+    return str(module_content.count(b"\n", 0, match.start()) + 1)
+
+
+@lru_cache(maxsize=None)
+def get_fn_line_nums(file_path: Path) -> dict[str, int]:
+    """Index all the functions in a module by a single pass over it.
+
+    Many functions from the same module are looked up, the first
+    definition of each name is kept.
+    """
+    module_content = get_file_content(file_path)
+    line_nums: dict[str, int] = {}
+    line_num = 1
+    last_pos = 0
+    for match in FN_DEFINITION_RE.finditer(module_content):
+        line_num += module_content.count(b"\n", last_pos, match.start())
+        last_pos = match.start()
+        line_nums.setdefault(match.group(1).decode(), line_num)
+    return line_nums
+
+
+@lru_cache(maxsize=None)
+def get_file_content(file_path: Path) -> bytes:
+    """Read the whole file just once, many functions are searched for in it."""
+    try:
+        return file_path.read_bytes()
+    except OSError:
+        return b""
 
 
 def replace_dollar_encodings(symbol_name: str) -> str:
-    REPLACEMENTS = {
-        "$LT$": "<",
-        "$GT$": ">",
-        "$RF$": "&",
-        "$C$": ",",
-        "..": "::",
-    }
-
-    for key, value in REPLACEMENTS.items():
+    if "$" not in symbol_name:
+        return symbol_name.replace("..", "::")
+
+    for key, value in DOLLAR_REPLACEMENTS.items():
         symbol_name = symbol_name.replace(key, value)
 
     # There could be many unicode characters (" ", "[", "}", etc.)
     # encoded as "$u20$", "$u5b$", etc.
+    if "$u" not in symbol_name:
+        return symbol_name
+    return UNICODE_ENCODING_RE.sub(_replace_unicode, symbol_name)
 
-    def _replace_unicode(match: re.Match[str]) -> str:
-        unicode_num = match.group(1)
-        try:
-            return chr(int(unicode_num, 16))
-        except ValueError:
-            return match.group(0)
 
-    return re.sub(r"\$u(\w\w)\$", _replace_unicode, symbol_name)
+def _replace_unicode(match: re.Match[str]) -> str:
+    unicode_num = match.group(1)
+    try:
+        return chr(int(unicode_num, 16))
+    except ValueError:
+        return match.group(0)
 
 
 def get_real_symbol_from_alias(symbol_name: str) -> str:
@@ -204,13 +243,11 @@ def get_rid_of_hex_suffix(name: str) -> str:
     # duplicated functions once being in "+" and once in "-", just with
     # different suffixes
     hex_length = 16
-    try:
-        int(name[-hex_length:].lower(), 16)
-        without_hex = name[:-hex_length]
-        # Also possibly get rid of ending "::h"
-        if without_hex.endswith("::h"):
-            return without_hex[:-3]
-        else:
-            return without_hex
-    except ValueError:
+    if len(name) < hex_length or not HEX_RE.fullmatch(name, len(name) - hex_length):
         return name
+    without_hex = name[:-hex_length]
+    # Also possibly get rid of ending "::h"
+    if without_hex.endswith("::h"):
+        return without_hex[:-3]
+    else:
+        return without_hex
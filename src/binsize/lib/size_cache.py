@@ -0,0 +1,44 @@
+"""
+Persistent cache for section sizes of already analyzed binaries.
+
+Analyzing a binary with `bloaty` is expensive, while the result
+does not change until the binary itself changes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Sequence
+
+from ..user_data import cache_dir
+from .source_definition_cache import write_file_atomically
+
+SIZES_CACHE_FILE = cache_dir / "sizes.json"
+
+
+def get_key(bin_file: str | Path, sections: Sequence[str] | None) -> str:
+    """Identify the binary together with the requested sections.
+
+    Binary is identified by its path, size and modification time,
+    which is much cheaper than hashing its content.
+    """
+    stat = os.stat(bin_file)
+    return f"{bin_file}_{stat.st_size}_{stat.st_mtime_ns}_{','.join(sections or ())}"
+
+
+def load(cache_file: str | Path = SIZES_CACHE_FILE) -> dict[str, dict[str, int]]:
+    """Get all the cached sizes. Empty when there is no valid cache."""
+    try:
+        with open(cache_file, "r") as f:
+            return json.load(f)
+    except (json.decoder.JSONDecodeError, FileNotFoundError):
+        return {}
+
+
+def save(
+    cache: dict[str, dict[str, int]], cache_file: str | Path = SIZES_CACHE_FILE
+) -> None:
+    """Persist all the sizes."""
+    write_file_atomically(cache_file, json.dumps(cache, separators=(",", ":")))
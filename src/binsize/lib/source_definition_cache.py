@@ -3,7 +3,12 @@ from __future__ import annotations
 import atexit
 import hashlib
 import json
+import os
+import tempfile
+import threading
+from functools import lru_cache
 from pathlib import Path
+from typing import TextIO
 
 from typing_extensions import TypedDict
 
@@ -19,13 +24,25 @@ class SourceDefinition(TypedDict):
 class SourceDefinitionCache(SourceDefinitionCacheAPI):
     def __init__(self, cache_file_path: str | Path | None = None):
         self.cache_file_path = cache_file_path
+        # Many symbols are defined in the same file, hashing each file only once,
+        # unless it was modified (file path -> (mtime_ns, size, hash of its content))
+        self._file_hashes: dict[str, tuple[int, int, str]] = {}
+        self._file_hashes_changed = False
+        # New definitions are appended to a journal file as they come,
+        # the whole cache file is rewritten only once the journal grows big
+        self._journal: TextIO | None = None
+        self._journal_entries = 0
+        # Definitions may be added from more threads
+        self._lock = threading.Lock()
         if self.cache_file_path is None:
             self.symbol_definitions: dict[str, SourceDefinition] = {}
         else:
             print(f"Cache file: {self.cache_file_path}")
             self.symbol_definitions = self._load_cache_from_file()
-            # So that we save the cache at the end
-            atexit.register(self._save_cache_to_file)
+            # Hashes are kept also between the runs, not to read all the files again
+            self._file_hashes = self._load_file_hashes()
+            # So that we finish the saving at the end
+            atexit.register(self._close)
 
     def add(self, symbol: str, definition: str) -> None:
         # When definition is empty, we cannot calculate any file hash
@@ -38,6 +55,8 @@ class SourceDefinitionCache(SourceDefinitionCacheAPI):
             "definition": definition,
             "file_hash": file_hash,
         }
+        if self.cache_file_path is not None:
+            self._append_to_journal(symbol, definition, file_hash)
 
     def get(self, symbol: str) -> str | None:
         if symbol in self.symbol_definitions:
@@ -63,8 +82,22 @@ class SourceDefinitionCache(SourceDefinitionCacheAPI):
         file_path = self._get_file_location_from_definition(definition)
         return self._get_file_hash(file_path)
 
+    def _get_file_hash(self, file_path: str | Path) -> str:
+        file_path = str(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return ""
+        memo = self._file_hashes.get(file_path)
+        if memo is not None and memo[:2] == (stat.st_mtime_ns, stat.st_size):
+            return memo[2]
+        file_hash = self._compute_file_hash(file_path)
+        self._file_hashes[file_path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+        self._file_hashes_changed = True
+        return file_hash
+
     @staticmethod
-    def _get_file_hash(file_path: str | Path) -> str:
+    def _compute_file_hash(file_path: str | Path) -> str:
         try:
             content = Path(file_path).read_bytes()
         except FileNotFoundError:
@@ -75,17 +108,126 @@ class SourceDefinitionCache(SourceDefinitionCacheAPI):
     def _get_file_location_from_definition(symbol_definition: str) -> str:
         # Delete the line number
         file_name = symbol_definition.split(":")[0]
-        return str(settings.ROOT_DIR / file_name)
+        return _get_file_location(settings.ROOT_DIR, file_name)
 
     def _load_cache_from_file(self) -> dict[str, SourceDefinition]:
         assert self.cache_file_path is not None
         try:
-            with open(self.cache_file_path, "r") as f:
-                return json.load(f)
+            with open(self.cache_file_path, "rb") as f:
+                symbol_definitions: dict[str, SourceDefinition] = json.load(f)
         except (json.decoder.JSONDecodeError, FileNotFoundError):
-            return {}
+            symbol_definitions = {}
+
+        # Replaying the journal, later entries overwriting the earlier ones
+        try:
+            with open(self._journal_path(), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        symbol, definition, file_hash = json.loads(line)
+                    except (ValueError, TypeError):
+                        # Possibly an unfinished line from an interrupted run
+                        continue
+                    symbol_definitions[symbol] = {
+                        "definition": definition,
+                        "file_hash": file_hash,
+                    }
+                    self._journal_entries += 1
+        except FileNotFoundError:
+            pass
+
+        return symbol_definitions
+
+    def _append_to_journal(self, symbol: str, definition: str, file_hash: str) -> None:
+        line = json.dumps([symbol, definition, file_hash], separators=(",", ":"))
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self._journal_path(), "a", encoding="utf-8")
+                # Interrupted run might have left an unfinished line there
+                if self._journal.tell() != 0:
+                    self._journal.write("\n")
+            self._journal.write(f"{line}\n")
+            # Not to lose the (expensive) definitions when the run gets interrupted
+            self._journal.flush()
+            self._journal_entries += 1
+
+    def _close(self) -> None:
+        # Compacting the journal into the cache file only when it holds
+        # a big part of all the definitions, not to rewrite all of them every time
+        if self._journal_entries * 2 > len(self.symbol_definitions):
+            self._save_cache_to_file()
+        else:
+            self._close_journal()
+            if self._file_hashes_changed:
+                self._save_file_hashes()
+
+    def _close_journal(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
 
     def _save_cache_to_file(self) -> None:
         assert self.cache_file_path is not None
-        with open(self.cache_file_path, "w") as f:
-            json.dump(self.symbol_definitions, f, indent=4)
+        self._close_journal()
+        # Encoding in one go is about twice as quick as `json.dump()`,
+        # which writes the output in many small chunks
+        # (a single big write goes past the file buffer, so its size does not matter)
+        # Written aside and moved into place - an interrupted write must not
+        # lose the definitions that are not in the journal anymore
+        write_file_atomically(
+            self.cache_file_path,
+            json.dumps(self.symbol_definitions, separators=(",", ":")),
+        )
+        # Everything from the journal is now in the cache file
+        try:
+            os.remove(self._journal_path())
+        except FileNotFoundError:
+            pass
+        self._journal_entries = 0
+        self._save_file_hashes()
+
+    def _save_file_hashes(self) -> None:
+        write_file_atomically(
+            self._file_hashes_path(),
+            json.dumps(self._file_hashes, separators=(",", ":")),
+        )
+
+    def _journal_path(self) -> Path:
+        assert self.cache_file_path is not None
+        cache_file_path = Path(self.cache_file_path)
+        return cache_file_path.with_name(f"{cache_file_path.stem}_journal.jsonl")
+
+    def _file_hashes_path(self) -> Path:
+        assert self.cache_file_path is not None
+        cache_file_path = Path(self.cache_file_path)
+        return cache_file_path.with_name(f"{cache_file_path.stem}_file_hashes.json")
+
+    def _load_file_hashes(self) -> dict[str, tuple[int, int, str]]:
+        try:
+            with open(self._file_hashes_path(), "rb") as f:
+                return {
+                    file_path: (mtime_ns, size, file_hash)
+                    for file_path, (mtime_ns, size, file_hash) in json.load(f).items()
+                }
+        except (ValueError, TypeError, OSError):
+            return {}
+
+
+@lru_cache(maxsize=None)
+def _get_file_location(root_dir: Path, file_name: str) -> str:
+    # Many symbols are defined in the same file, and joining
+    # the paths is surprisingly expensive
+    return str(root_dir / file_name)
+
+
+def write_file_atomically(file_path: str | Path, content: str) -> None:
+    """Replace the file content, readers see either the old or the new one."""
+    file_path = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -5,21 +5,29 @@ Creates a tree of files with overall sizes of symbols defined in them.
 from __future__ import annotations
 
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
+from ..lib.api import SLOTS
+
 if TYPE_CHECKING:  # pragma: no cover
     from ..lib.api import BinarySizeAPI, DataRow
 
-    FileTree = dict[str, "FileTree" | list["File"]]
-
 
-@dataclass
+@dataclass(**SLOTS)
 class File:
     name: str
     size: int
 
 
+@dataclass(**SLOTS)
+class FileTree:
+    children: dict[str, FileTree] = field(default_factory=dict)
+    files: list[File] = field(default_factory=list)
+    # Total size of all files in the directory, including sub-directories
+    size: int = 0
+
+
 class SizeTreePlugin:
     def __init__(
         self,
@@ -30,11 +38,8 @@ class SizeTreePlugin:
     def get(self) -> FileTree:
         """Get the tree."""
         recursive_path: FileTree = get_default_tree()
-        data = self.binary_size.get()
-        all_unique_files = {get_file(item) for item in data}
-        file_sizes = get_file_sizes(data)
-        for file in all_unique_files:
-            size = file_sizes.get(file, 0)
+        file_sizes = get_file_sizes(self.binary_size.get())
+        for file, size in file_sizes.items():
             attach(file, recursive_path, size)
 
         return recursive_path
@@ -45,13 +50,13 @@ class SizeTreePlugin:
         pretty_print(recursive_path)
 
 
-# To identify a list of files in a dict - otherwise its keys are directory names
+# Files are listed at the place of this name among the sorted directory names
 FILE_MARKER = "<files>"
 
 
 def get_default_tree() -> FileTree:
     """Get the default tree structure."""
-    return defaultdict(dict, ((FILE_MARKER, []),))
+    return FileTree()
 
 
 def get_file(row: DataRow) -> str:
@@ -59,7 +64,8 @@ def get_file(row: DataRow) -> str:
     if row.module_name:
         return row.module_name
     else:
-        return row.source_definition.split(":", 1)[0]
+        # Not creating any list, only the file name is needed
+        return row.source_definition.partition(":")[0]
 
 
 def get_file_sizes(data: list[DataRow]) -> dict[str, int]:
@@ -73,44 +79,39 @@ def get_file_sizes(data: list[DataRow]) -> dict[str, int]:
 
 def attach(branch: str, trunk: FileTree, file_size: int) -> None:
     """Insert a branch of directories on its trunk."""
-    parts = branch.split("/", 1)
-    if len(parts) == 1:  # branch is a file
-        file = File(name=parts[0], size=file_size)
-        trunk[FILE_MARKER].append(file)
-    else:
-        node, others = parts
-        if node not in trunk:
-            trunk[node] = get_default_tree()
-        new_trunk = trunk[node]
-        assert isinstance(new_trunk, dict)
-        attach(others, new_trunk, file_size)
+    *dirs, file_name = branch.split("/")
+    node = trunk
+    # Each directory on the way contains the file
+    node.size += file_size
+    for dir_name in dirs:
+        child = node.children.get(dir_name)
+        if child is None:
+            child = get_default_tree()
+            node.children[dir_name] = child
+        node = child
+        node.size += file_size
+    node.files.append(File(name=file_name, size=file_size))
 
 
 def pretty_print(d: FileTree, indent: int = 0) -> None:
     """Print the file tree structure with proper indentation and sizes."""
     space = "    "
-    for key, value in sorted(d.items(), key=lambda item: item[0]):
-        if key == FILE_MARKER:
-            assert isinstance(value, list)
-            if value:
-                for file in sorted(value, key=lambda f: f.size, reverse=True):
-                    print(f"{space * indent}{file.size:_} {file.name}")
-        else:
-            assert isinstance(value, dict)
-            size = get_dir_size(value)
-            print(f"{space * indent}{size:_} {key}")
-            pretty_print(value, indent + 1)
-
-
-def get_dir_size(d: FileTree) -> int:
-    """Get the total size of all files in the directory, including sub-directories."""
-    size = 0
-    for key, value in d.items():
+    # Explicit stack of (name, directory, indent) to print, name being
+    # FILE_MARKER for printing the files of the directory
+    # Items are popped from the end, so adding them in reversed order
+    # (each directory is sorted only once - the tree is built anew for every print)
+    stack: list[tuple[str, FileTree, int]] = []
+
+    def _add_directory_content(d: FileTree, indent: int) -> None:
+        for key in sorted([*d.children, FILE_MARKER], reverse=True):
+            stack.append((key, d if key == FILE_MARKER else d.children[key], indent))
+
+    _add_directory_content(d, indent)
+    while stack:
+        key, d, indent = stack.pop()
         if key == FILE_MARKER:
-            assert isinstance(value, list)
-            for file in value:
-                size += file.size
+            for file in sorted(d.files, key=lambda f: f.size, reverse=True):
+                print(f"{space * indent}{file.size:_} {file.name}")
         else:
-            assert isinstance(value, dict)
-            size += get_dir_size(value)
-    return size
+            print(f"{space * indent}{d.size:_} {key}")
+            _add_directory_content(d, indent + 1)
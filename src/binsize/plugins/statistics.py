@@ -5,15 +5,18 @@ Groups data into categories and returns statistics about each category.
 from __future__ import annotations
 
 import inspect
+from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable
 
+from ..lib.api import SLOTS
+
 if TYPE_CHECKING:  # pragma: no cover
     from ..lib.api import BinarySizeAPI, DataRow
 
 
-@dataclass
+@dataclass(**SLOTS)
 class CategoryStatistics:
     category: str | None
     size: int
@@ -23,7 +26,7 @@ class CategoryStatistics:
         return f"{self.size:>10_}: {str(self.category):<20} ({self.symbol_amount:>5_} symbols)"
 
 
-@dataclass
+@dataclass(**SLOTS)
 class CategoryRow:
     category: str | None
     data_row: DataRow
@@ -42,7 +45,14 @@ class StatisticsPlugin:
         # Function that takes a row and returns a string, that will be
         # used as a category for the row. Returns None if no category matches.
         self.categories_func = categories_func
-        self.row_data_with_category = self._include_category_data()
+        # Only needed for showing the individual rows, created on first use
+        self._row_data_with_category: list[CategoryRow] | None = None
+
+    @property
+    def row_data_with_category(self) -> list[CategoryRow]:
+        if self._row_data_with_category is None:
+            self._row_data_with_category = self._include_category_data()
+        return self._row_data_with_category
 
     def get(self) -> list[CategoryStatistics]:
         return self._get_categories_statistics()
@@ -84,19 +94,28 @@ class StatisticsPlugin:
         return set([row.category for row in self.row_data_with_category])
 
     def _get_categories_statistics(self) -> list[CategoryStatistics]:
-        all_categories: list[CategoryStatistics] = []
-        for category in self._get_all_categories():
-            all_category_items = [
-                row for row in self.row_data_with_category if row.category == category
-            ]
-            all_categories.append(
-                CategoryStatistics(
-                    category=category,
-                    size=sum(row.data_row.size for row in all_category_items),
-                    symbol_amount=len(all_category_items),
-                )
+        # Single pass over all the rows, accumulating [size, symbol_amount]
+        # Categorizing the rows directly, unless they already are
+        if self._row_data_with_category is not None:
+            rows_with_category = (
+                (row.category, row.data_row) for row in self._row_data_with_category
+            )
+        else:
+            categories_func = self.categories_func
+            rows_with_category = (
+                (categories_func(row), row) for row in self.binary_size.get()
             )
 
+        category_sums: dict[str | None, list[int]] = defaultdict(lambda: [0, 0])
+        for category, data_row in rows_with_category:
+            sums = category_sums[category]
+            sums[0] += data_row.size
+            sums[1] += 1
+
+        all_categories = [
+            CategoryStatistics(category=category, size=size, symbol_amount=amount)
+            for category, (size, amount) in category_sums.items()
+        ]
         all_categories.sort(key=lambda x: x.size, reverse=True)
         return all_categories
 
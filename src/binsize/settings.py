@@ -9,6 +9,7 @@ from __future__ import annotations
 import json
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal
 
@@ -31,19 +32,29 @@ print(f"Settings file: {SETTINGS}")
 if TYPE_CHECKING:
     KEYS = Literal["root", "elf_file", "map_file", "build_cmd"]
 
+VARIABLE_RE = re.compile(r"\{\{(.*?)\}\}")
 
-def get_settings() -> dict[str, str]:
-    """Get the settings as a dict."""
+
+@lru_cache(maxsize=1)
+def _load_settings() -> dict[str, str]:
+    # Reading the file only once, it is changed only by `update_settings()`
     with open(SETTINGS) as f:
         return json.load(f)
 
 
+def get_settings() -> dict[str, str]:
+    """Get the settings as a dict."""
+    # A copy, so that the cached settings cannot be changed by the caller
+    return dict(_load_settings())
+
+
 def update_settings(key: str, value: str) -> None:
     """Update a value in the settings file."""
     settings = get_settings()
     settings[key] = value
     with open(SETTINGS, "w") as f:
         json.dump(settings, f, indent=4)
+    _load_settings.cache_clear()
 
 
 def set_root_dir(root_dir: str) -> None:
@@ -56,7 +67,7 @@ def set_root_dir(root_dir: str) -> None:
 
 def get(key: KEYS) -> str:
     """Get a value from the settings file."""
-    return resolve_variables(get_settings()[key])
+    return resolve_variables(_load_settings()[key])
 
 
 def resolve_variables(value: str) -> str:
@@ -71,7 +82,7 @@ def resolve_variables(value: str) -> str:
         variable = m.group(1).strip()
         return get(variable)  # type: ignore
 
-    return re.sub(r"\{\{(.*?)\}\}", _replace_by_variable, value)
+    return VARIABLE_RE.sub(_replace_by_variable, value)
 
 
 # Checking env variable containing the root dir
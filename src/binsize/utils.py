@@ -19,8 +19,14 @@ def get_sections_sizes(
     bloaty_cmd = f"bloaty --csv {bin_file}"
     csv_output = BloatyDataLoader().get_csv_output(bloaty_cmd)
 
-    csv_reader = csv.DictReader(StringIO(csv_output))
-    result = {row["sections"]: int(row["filesize"]) for row in csv_reader}
+    # Accessing the columns by index, without creating a dict for each row
+    csv_reader = csv.reader(StringIO(csv_output))
+    header = next(csv_reader, None)
+    result: dict[str, int] = {}
+    if header is not None:
+        sections_index = header.index("sections")
+        filesize_index = header.index("filesize")
+        result = {row[sections_index]: int(row[filesize_index]) for row in csv_reader}
     if sections:
         result = {section: result[section] for section in sections}
     return result
@@ -295,3 +295,19 @@ def test_filter():
             size=328,
         ),
     ]
+
+
+def test_searchable_follows_row_changes():
+    BS = get_bloaty_BS().load_csv(BLOATY_MOCK_CSV)
+    row = BS.get()[6]
+    assert "decode.rs" not in row.searchable()
+    BS.add_basic_info()
+    assert "embed/rust/src/protobuf/decode.rs" in row.searchable()
+    assert "rust" in row.searchable()
+
+
+def test_id_follows_basic_info():
+    row = mock_data_row(symbol_name="sym", section=".flash")
+    assert row.id() == ".flash_sym"
+    row.module_name = "mod.c"
+    assert row.id() == ".flash_mod.c"
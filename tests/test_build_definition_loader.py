@@ -13,3 +13,16 @@ def test_loader():
     def_loader.load(settings.ELF_FILE)
     assert def_loader.get("unexisting") is None
     assert def_loader.get("nist256p1") == "vendor/trezor-crypto/nist256p1.c:26"
+
+
+def test_loader_from_lines():
+    def_loader = BuildDefinitionLoader()
+    nm_lines = [
+        f"00000026 T nist256p1\t{settings.ROOT_DIR}/vendor/trezor-crypto/nist256p1.c:26\n",
+        "00000004 t no_definition\n",
+        "00000008 T elsewhere\t/usr/lib/elsewhere.c:3\n",
+    ]
+    def_loader._load_from_lines(nm_lines)
+    assert def_loader.get("nist256p1") == "vendor/trezor-crypto/nist256p1.c:26"
+    assert def_loader.get("no_definition") is None
+    assert def_loader.get("elsewhere") == "/usr/lib/elsewhere.c:3"
@@ -0,0 +1,20 @@
+import click
+
+from binsize.cli.binsize import SUBCOMMANDS, cli
+
+
+def test_subcommands():
+    ctx = click.Context(cli)
+    assert cli.list_commands(ctx) == [
+        "build",
+        "commit",
+        "compare",
+        "get",
+        "history",
+        "tree",
+    ]
+    for name in SUBCOMMANDS:
+        command = cli.get_command(ctx, name)
+        assert isinstance(command, click.Command)
+        assert command.name == name
+    assert cli.get_command(ctx, "unexisting") is None
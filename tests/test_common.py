@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import atexit
+import json
+from pathlib import Path
+
+import pytest
+
+from binsize.lib.common import file_cache
+
+
+def test_file_cache_saves_only_new_results(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    cache_file = tmp_path / "cache.json"
+    cache_file.write_text(json.dumps({"cached": 1}))
+
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+
+    @file_cache(cache_file)
+    def get_length(param: str) -> int:
+        return len(param)
+
+    # Read-only usage does not save anything
+    assert get_length("cached") == 1
+    assert registered == []
+
+    # Saving is registered only once
+    assert get_length("new") == 3
+    assert get_length("newer") == 5
+    assert len(registered) == 1
+
+    registered[0]()
+    assert json.loads(cache_file.read_text()) == {"cached": 1, "new": 3, "newer": 5}
+
+
+def test_file_cache_loads_on_first_use(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+
+    @file_cache(cache_file)
+    def get_length(param: str) -> int:
+        return len(param)
+
+    # Created only after the decoration, still used
+    cache_file.write_text(json.dumps({"cached": 100}))
+    assert get_length("cached") == 100
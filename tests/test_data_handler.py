@@ -53,3 +53,13 @@ def test_row_handler_factory_c(symbol_name: str):
         RowHandlerFactory()(mock_data_row(symbol_name=symbol_name)),
         CRow,
     )
+
+
+def test_row_handler_factory_reuses_handlers():
+    factory = RowHandlerFactory()
+    assert factory(mock_data_row(symbol_name="fun_crypto")) is factory(
+        mock_data_row(symbol_name="two_over_pi")
+    )
+    assert factory(mock_data_row(symbol_name="core::fmt::write")) is factory(
+        mock_data_row(symbol_name="trezor_lib::ui::util::try_or_raise")
+    )
@@ -29,3 +29,18 @@ def test_load_csv():
             size=1116,
         ),
     ]
+
+
+def test_load_csv_sections():
+    row_data = BloatyDataLoader().load_data_from_csv(
+        BLOATY_MOCK_CSV, sections=[".flash"]
+    )
+    assert len(row_data) == 3
+    assert all(row.section == ".flash" for row in row_data)
+    assert row_data[0] == mock_data_row(
+        section=".flash", symbol_name="nist256p1", size=37084
+    )
+
+    assert BloatyDataLoader().load_data_from_csv(BLOATY_MOCK_CSV, sections=[]) == (
+        BloatyDataLoader().load_data_from_csv(BLOATY_MOCK_CSV)
+    )
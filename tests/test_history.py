@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from binsize.cli import history
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(repo), *args], text=True).strip()
+
+
+def _commit_source(repo: Path, content: str) -> str:
+    (repo / "core" / "source.txt").write_text(content)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", content)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+def test_build_runs_in_worktree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    repo = tmp_path / "repo"
+    (repo / "core").mkdir(parents=True)
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.email", "test@example.com")
+    _git(repo, "config", "user.name", "Test")
+    old_hash = _commit_source(repo, "old")
+    _commit_source(repo, "new")
+
+    # Relative command and ELF file, run from a subdirectory of the main tree
+    monkeypatch.chdir(repo / "core")
+    monkeypatch.setattr(history, "BUILD_CMD", "cp source.txt firmware.elf")
+    monkeypatch.setattr(history, "ELF_FILE", "firmware.elf")
+    history.get_repo_toplevel.cache_clear()
+    try:
+        history.create_binaries([old_hash])
+    finally:
+        history.get_repo_toplevel.cache_clear()
+
+    # Built from the requested commit, the main tree stays untouched
+    assert (repo / "core" / f"firmware.elf_{old_hash}").read_text() == "old"
+    assert not (repo / "core" / "firmware.elf").exists()
+    assert (repo / "core" / "source.txt").read_text() == "new"
+
+
+def test_failed_worktree_add_cleans_up(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # Not a git repository, so the worktree cannot be added
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(history.tempfile, "tempdir", str(tmp_path))
+    with pytest.raises(subprocess.CalledProcessError):
+        with history.build_worktree():
+            pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_in_worktree(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(history, "get_repo_toplevel", lambda: "/x/trezor-firmware")
+    worktree_dir = Path("/tmp/wt")
+    assert history.in_worktree("/x/trezor-firmware", worktree_dir) == "/tmp/wt"
+    assert (
+        history.in_worktree("/x/trezor-firmware/core/firmware.elf", worktree_dir)
+        == "/tmp/wt/core/firmware.elf"
+    )
+    # Only whole path components
+    assert (
+        history.in_worktree("/x/trezor-firmware-tools/build", worktree_dir)
+        == "/x/trezor-firmware-tools/build"
+    )
+    assert history.in_worktree("build_firmware", worktree_dir) == "build_firmware"
+
+
+def test_worktree_cwd_symlinked_checkout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    (tmp_path / "repo" / "core").mkdir(parents=True)
+    (tmp_path / "link").symlink_to(tmp_path / "repo")
+    monkeypatch.setattr(history, "get_repo_toplevel", lambda: str(tmp_path / "link"))
+    monkeypatch.chdir(tmp_path / "link" / "core")
+    assert history.worktree_cwd(Path("/tmp/wt")) == Path("/tmp/wt/core")
+
+
+def test_worktree_cwd_outside_repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "repo").mkdir()
+    monkeypatch.setattr(history, "get_repo_toplevel", lambda: str(tmp_path / "repo"))
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match="is not inside the repository"):
+        history.worktree_cwd(Path("/tmp/wt"))
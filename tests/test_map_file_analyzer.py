@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from binsize.lib.map_file_analyzer import (
+    Entry,
+    SectionItem,
+    _build_prefix_tree,
+    _get_section_lines,
+    _subtree_sizes_output,
+)
+
+
+def _section_data(sizes: dict[str, int]) -> dict[str, SectionItem]:
+    section_data: dict[str, SectionItem] = {}
+    for name, size in sizes.items():
+        item = SectionItem(name)
+        item.entries.append(Entry(section=item, address=0, size=size, comment=""))
+        section_data[name] = item
+    return section_data
+
+
+def test_build_prefix_tree():
+    section_data = _section_data({"abcd": 1, "abxy": 2, "ab": 3, "zzz": 4})
+    tree = _build_prefix_tree(section_data)
+    assert tree == {
+        "ab": {
+            "cd": section_data["abcd"],
+            "xy": section_data["abxy"],
+            "": section_data["ab"],
+        },
+        "zzz": section_data["zzz"],
+    }
+
+
+def test_subtree_sizes_output():
+    section_data = _section_data({"abcd": 1, "abxy": 2, "ab": 3, "zzz": 4})
+    output, total = _subtree_sizes_output(_build_prefix_tree(section_data))
+    assert total == 10
+    assert output.splitlines() == [
+        "ab: 6",
+        "    *abcd: 1",
+        "    *abxy: 2",
+        "    *ab: 3",
+        "*zzz: 4",
+    ]
+
+
+def test_get_section_lines(tmp_path: Path):
+    map_file = tmp_path / "firmware.map"
+    map_file.write_text(
+        ".flash2 0x0 0x10\n"
+        " .text.a 0x0 0x10\n"
+        ".flash 0x0 0x30\n"
+        " .text.b\n"
+        "                0x10 0x20 b.o\n"
+        ".data 0x0 0x0\n"
+    )
+    assert list(_get_section_lines(map_file, ".flash")) == [
+        " .text.b\n",
+        "                0x10 0x20 b.o\n",
+    ]
+    assert list(_get_section_lines(map_file, ".flash2")) == [" .text.a 0x0 0x10\n"]
+    assert list(_get_section_lines(map_file, ".data")) == []
+    with pytest.raises(ValueError):
+        list(_get_section_lines(map_file, ".bss"))
@@ -4,6 +4,7 @@ import pytest
 
 from binsize import settings
 from binsize.lib.map_file_includer import (
+    RowIndex,
     add_map_file_info,
     decrease_size_of_mysterious_section,
     get_symbol_sizes,
@@ -48,6 +49,19 @@ def test_get_symbols_we_miss():
     assert res == set(["bbb.str1.1", "zzz"])
 
 
+def test_get_symbols_we_miss_index():
+    index = RowIndex.from_rows(ROW_DATA)
+    assert index.section_symbols[".flash2"] == {"[section .flash2]", "eee", "fff"}
+    assert set(index.section_rows) == {"[section .flash]", "[section .flash2]"}
+    res = get_symbols_we_miss(ROW_DATA, MAP_SYMBOL_SIZES, ".flash", index)
+    assert res == set(["bbb.str1.1", "zzz"])
+
+    # Newly added rows are taken into account
+    index.add_rows([mock_data_row(section=".flash", symbol_name="zzz", size=3)])
+    res = get_symbols_we_miss(ROW_DATA, MAP_SYMBOL_SIZES, ".flash", index)
+    assert res == set(["bbb.str1.1"])
+
+
 def test_add_map_file_info():
     map_symbols_we_miss = set(["bbb.str1.1", "zzz"])
     row_data = ROW_DATA.copy()
@@ -69,7 +83,8 @@ def test_add_map_file_info():
 def test_decrease_size_of_mysterious_section():
     row_data = ROW_DATA.copy()
     assert len(row_data) == 9
-    decrease_size_of_mysterious_section(row_data, section=".flash", added_size=5)
+    section_rows = {row.symbol_name: row for row in row_data}
+    decrease_size_of_mysterious_section(section_rows, section=".flash", added_size=5)
     assert len(row_data) == 9
     assert row_data[0] == mock_data_row(
         section=".flash", symbol_name="[section .flash]", size=14 - 5
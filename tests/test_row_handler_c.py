@@ -1,10 +1,20 @@
+from __future__ import annotations
+
+from pathlib import Path
+
 import pytest
 
+from binsize import settings
+from binsize.lib import row_handler_c
 from binsize.lib.row_handler_c import (
     CRow,
     clean_special_symbols,
+    find_at_least_something,
+    get_existing_definition,
+    prefetch_symbol_lines,
     validate_line_for_definition,
 )
+from binsize.lib.source_definition_cache import SourceDefinitionCache
 
 from .common import mock_data_row
 
@@ -300,3 +310,91 @@ def test_validate_line_for_definition_special_true(symbol: str, line: str):
 )
 def test_validate_line_for_definition_false(line_with_SYMBOL: str):
     assert validate_line_for_definition(line_with_SYMBOL, "SYMBOL") is False
+
+
+def test_prefetched_definitions_are_the_same(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "embed" / "extmod").mkdir(parents=True)
+    (tmp_path / "vendor" / "lib.h").write_text("void used_here(void);\n")
+    (tmp_path / "vendor" / "lib.c").write_text(
+        "// used_here is defined below\n"
+        "void used_here(void) {\n"
+        "static const int table_x[2] = {1, 2}; int other_table_x;\n"
+    )
+    (tmp_path / "embed" / "extmod" / "mod.c").write_text(
+        "STATIC mp_obj_t mod_trezorx_call(void) {\n"
+    )
+    (tmp_path / "embed" / "main.c").write_text("int mod_trezorx_call(void) {\n")
+    monkeypatch.setattr(settings, "ROOT_DIR", tmp_path)
+
+    symbols = ["used_here", "table_x", "mod_trezorx_call", "nowhere", "table_x.0"]
+    one_by_one = [get_existing_definition(symbol) for symbol in symbols]
+    assert one_by_one == [
+        f"{tmp_path}/vendor/lib.c:2",
+        f"{tmp_path}/vendor/lib.c:3",
+        f"{tmp_path}/embed/extmod/mod.c:1",
+        "",
+        f"{tmp_path}/vendor/lib.c:3",
+    ]
+
+    symbol_lines = prefetch_symbol_lines(symbols)
+    assert set(symbol_lines) == set(symbols[:-1])
+    assert [
+        get_existing_definition(symbol, symbol_lines=symbol_lines) for symbol in symbols
+    ] == one_by_one
+
+
+def test_prefetch_definitions_skips_cached(monkeypatch: pytest.MonkeyPatch):
+    prefetched: list[list[str]] = []
+
+    def _prefetch_symbol_lines(symbols: list[str]) -> dict[str, list[str]]:
+        prefetched.append(list(symbols))
+        return {symbol: [] for symbol in symbols}
+
+    monkeypatch.setattr(row_handler_c, "prefetch_symbol_lines", _prefetch_symbol_lines)
+    source_def_cache = SourceDefinitionCache()
+    source_def_cache.add("known_symbol", "")
+    rows = [
+        mock_data_row(symbol_name="known_symbol"),
+        mock_data_row(symbol_name="unknown_symbol.0"),
+        mock_data_row(symbol_name="[section .flash]"),
+    ]
+    c_row = CRow(source_def_cache)
+    c_row.prefetch_definitions(rows)
+    assert prefetched == [["unknown_symbol"]]
+    # Kept only for the rows of the latest prefetch
+    assert c_row._symbol_lines == {"unknown_symbol": []}
+    c_row.prefetch_definitions(rows[2:])
+    assert c_row._symbol_lines == {}
+
+
+def test_get_definition_once_per_name(monkeypatch: pytest.MonkeyPatch):
+    searched: list[str] = []
+
+    def _get_existing_definition(
+        symbol_name: str, accept_declaration: bool = False, symbol_lines=None
+    ):
+        searched.append(symbol_name)
+        return "vendor/lib.c:3"
+
+    monkeypatch.setattr(
+        row_handler_c, "get_existing_definition", _get_existing_definition
+    )
+    c_row = CRow()
+    for symbol_name in ("symbol.constprop.0", "symbol.part.1", "other"):
+        row = c_row.add_basic_info(mock_data_row(symbol_name=symbol_name))
+        assert c_row._get_definition(row) == "vendor/lib.c:3"
+    assert searched == ["symbol", "other"]
+
+
+def test_find_at_least_something_prefers_vendor(tmp_path: Path):
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "embed").mkdir()
+    (tmp_path / "embed" / "a.c").write_text("int some_symbol_x;\n")
+    (tmp_path / "vendor" / "z.h").write_text("#define some_symbol_y 1\n")
+    dirs = (tmp_path / "vendor", tmp_path / "embed")
+    assert find_at_least_something("some_symbol", *dirs) == f"{tmp_path}/vendor/z.h"
+    assert find_at_least_something("some_symbol_x", *dirs) == f"{tmp_path}/embed/a.c"
+    assert find_at_least_something("other_symbol", *dirs) == ""
@@ -1,7 +1,14 @@
+from __future__ import annotations
+
+from pathlib import Path
+
 import pytest
 
+from binsize import settings
+from binsize.lib import row_handler_mpy
 from binsize.lib.row_handler_mpy import (
     MicropythonRow,
+    ObjectDefinition,
     get_module_object_definitions,
     remove_strange_suffixes,
     resolve_function_name,
@@ -356,3 +363,91 @@ def test_get_definition(module: str, func: str, definition: str):
         MPR._get_definition(mock_data_row(module_name=module, func_name=func))
         == definition
     )
+
+
+def test_module_object_definitions_disk_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    (tmp_path / "src").mkdir()
+    module_file = tmp_path / "src" / "module.py"
+    module_file.write_text("class Cls:\n    def method(self):\n        pass\n")
+    monkeypatch.setattr(settings, "ROOT_DIR", tmp_path)
+    monkeypatch.setattr(
+        row_handler_mpy, "MODULE_DEFINITIONS_CACHE_DIR", tmp_path / "cache"
+    )
+    get_uncached = get_module_object_definitions.__wrapped__  # type: ignore
+
+    definitions = get_uncached("src/module.py")
+    assert definitions.class_names() == ["Cls"]
+    # Only the final cache file stays there
+    assert [f.suffix for f in (tmp_path / "cache").iterdir()] == [".pickle"]
+
+    # Not parsing the module again when it did not change
+    def _parse(module_path: str | Path) -> None:
+        raise AssertionError("should not be parsed")
+
+    with monkeypatch.context() as m:
+        m.setattr(row_handler_mpy, "parse_module_object_definitions", _parse)
+        assert get_uncached("src/module.py") == definitions
+
+    module_file.write_text("def func():\n    pass\n")
+    definitions = get_uncached("src/module.py")
+    assert definitions.class_names() == []
+    assert definitions.func_names() == ["func"]
+
+    # Failing to save the cache is not an error, and leaves nothing behind
+    def _replace(src: str, dst: str) -> None:
+        raise PermissionError(dst)
+
+    module_file.write_text("def other():\n    pass\n")
+    with monkeypatch.context() as m:
+        m.setattr(row_handler_mpy.os, "replace", _replace)
+        assert get_uncached("src/module.py").func_names() == ["other"]
+    assert [f.suffix for f in (tmp_path / "cache").iterdir()] == [".pickle"]
+
+
+def test_object_definition_lookups():
+    def _obj(name: str, start_line: int) -> ObjectDefinition:
+        return ObjectDefinition(name, [], [], start_line, start_line + 1)
+
+    mod = ObjectDefinition(
+        name="module",
+        functions=[_obj("func", 1), _obj("func", 5)],
+        classes=[_obj("Cls", 10)],
+        start_line=0,
+        end_line=20,
+    )
+    assert mod.has_top_level_func("func")
+    assert not mod.has_top_level_func("Cls")
+    assert mod.has_top_level_class("Cls")
+    # The first definition wins
+    assert mod.get_line_number("func()") == 1
+    assert mod.get_line_number("Cls") == 10
+    assert mod.get_line_number("other()") == 0
+    assert mod.resolve_symbol("Cls_func") == "Cls"
+
+
+def test_resolve_module_in_dir_tree(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    for file in (
+        "src/apps/common/paths.py",
+        "src/apps/bitcoin/sign_tx/bitcoin.py",
+        "src/apps/bitcoin/sign_tx/__init__.py",
+    ):
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text("")
+    monkeypatch.setattr(settings, "ROOT_DIR", tmp_path)
+    resolve_uncached = resolve_module.__wrapped__  # type: ignore
+
+    assert resolve_uncached("apps_common_paths") == ("src/apps/common/paths.py", True)
+    assert resolve_uncached("apps_bitcoin_sign_tx_bitcoin") == (
+        "src/apps/bitcoin/sign_tx/bitcoin.py",
+        True,
+    )
+    assert resolve_uncached("apps_bitcoin_sign_tx___init__") == (
+        "src/apps/bitcoin/sign_tx/__init__.py",
+        True,
+    )
+    assert resolve_uncached("apps_common_other") == (
+        "src/apps/common/other.py",
+        False,
+    )
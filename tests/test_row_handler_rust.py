@@ -1,8 +1,13 @@
+from pathlib import Path
+
 import pytest
 
+from binsize import settings
 from binsize.lib.row_handler_rust import (
     RustRow,
+    get_line_num,
     get_real_symbol_from_alias,
+    get_rid_of_hex_suffix,
     replace_dollar_encodings,
 )
 
@@ -169,6 +174,31 @@ def test_add_basic_info_row_handlers():
     assert new_row.func_name == "Decoder::decode_field()"
 
 
+def test_add_basic_info_cargo_data():
+    # Rows with a "/cargo/" build definition come here even with C-like names
+    row = mock_data_row(
+        symbol_name=".rodata..L__unnamed_1",
+        build_definition="/cargo/registry/src/core/src/fmt/mod.rs:12",
+        size=100,
+    )
+    new_row = RR.add_basic_info(row)
+    assert new_row.data_size == 100
+    assert new_row.logic_size == 0
+
+
+def test_add_basic_info_shares_module_names():
+    rows = [
+        RR.add_basic_info(mock_data_row(symbol_name=symbol_name))
+        for symbol_name in (
+            "trezor_lib::protobuf::decode::Decoder::decode_field::hab425281b2042fd5",
+            "trezor_lib::protobuf::decode::Decoder::message_from_stream::h1111111111111111",
+        )
+    ]
+    assert rows[0].module_name.endswith("embed/rust/src/protobuf/decode.rs")
+    # Not only equal, but the very same string
+    assert rows[0].module_name is rows[1].module_name
+
+
 @pytest.mark.parametrize(
     "module,func,definition",
     [
@@ -204,3 +234,54 @@ def test_get_definition(module: str, func: str, definition: str):
         RR._get_definition(mock_data_row(module_name=module, func_name=func))
         == definition
     )
+
+
+def test_get_line_num(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "lib.rs").write_text(
+        "struct Decoder;\n"
+        "impl Decoder {\n"
+        "    pub fn decode<T>(&self) {}\n"
+        "    fn decode_field(&self) {}\n"
+        "}\n"
+    )
+    monkeypatch.setattr(settings, "ROOT_DIR", tmp_path)
+    assert get_line_num("lib.rs", "Decoder::decode()") == "3"
+    assert get_line_num("lib.rs", "Decoder::decode_field()") == "4"
+    assert get_line_num("lib.rs", "encode()") == ""
+    assert get_line_num("missing.rs", "decode()") == ""
+
+
+def test_get_line_num_first_definition(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    (tmp_path / "lib.rs").write_text(
+        "fn new() {}\n"
+        "// fn new_like is not defined here\n"
+        "impl Other {\n"
+        "    fn new() {}\n"
+        "    fn größe() {}\n"
+        "}\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(settings, "ROOT_DIR", tmp_path)
+    assert get_line_num("lib.rs", "Other::new()") == "1"
+    assert get_line_num("lib.rs", "new_like()") == ""
+    assert get_line_num("lib.rs", "größe()") == "5"
+
+
+@pytest.mark.parametrize(
+    "symbol,result",
+    [
+        (
+            "core::result::Result$LT$T$C$E$GT$::unwrap::h4f1909c33dccc883",
+            "core::result::Result$LT$T$C$E$GT$::unwrap",
+        ),
+        ("unwrap4F1909C33DCCC883", "unwrap"),
+        (
+            "trezor_lib::protobuf::decode::Decoder::message_from_stream",
+            "trezor_lib::protobuf::decode::Decoder::message_from_stream",
+        ),
+        # Short names are not a hex suffix, even when they look like hex
+        ("dead", "dead"),
+    ],
+)
+def test_get_rid_of_hex_suffix(symbol: str, result: str):
+    assert get_rid_of_hex_suffix(symbol) == result
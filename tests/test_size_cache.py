@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from binsize.lib import size_cache
+
+
+def test_get_key(tmp_path: Path):
+    bin_file = tmp_path / "firmware.elf"
+    bin_file.write_bytes(b"abc")
+    key = size_cache.get_key(bin_file, (".flash", ".flash2"))
+    assert key.endswith("_.flash,.flash2")
+    assert key != size_cache.get_key(bin_file, None)
+
+    # Content change invalidates the key
+    bin_file.write_bytes(b"abcdef")
+    assert key != size_cache.get_key(bin_file, (".flash", ".flash2"))
+
+
+def test_load_and_save(tmp_path: Path):
+    cache_file = tmp_path / "sizes.json"
+    # Empty file is not a valid cache
+    cache_file.write_text("")
+    assert size_cache.load(cache_file) == {}
+    size_cache.save({"abc_.flash": {".flash": 123}}, cache_file)
+    assert size_cache.load(cache_file) == {"abc_.flash": {".flash": 123}}
+    assert list(tmp_path.iterdir()) == [cache_file]
+
+    assert size_cache.load(tmp_path / "unexisting.json") == {}
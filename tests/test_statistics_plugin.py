@@ -36,10 +36,14 @@ APP_CATEGORIES = [
     None,
 ]
 
+APPS_DIR_RE = re.compile(r"src/apps/(\w+)/")
+
 
 def apps_categories(row: DataRow) -> str | None:
-    pattern = r"^src/apps/(\w+)/"
-    match = re.search(pattern, row.module_name)
+    # Most of the rows are not from apps, no need to run the regex for them
+    if not row.module_name.startswith("src/apps/"):
+        return None
+    match = APPS_DIR_RE.match(row.module_name)
     if not match:
         return None
     else:
@@ -70,3 +74,9 @@ def test_get_categories_statistics():
         CategoryStatistics(category="nem", size=3 * 333, symbol_amount=3),
         CategoryStatistics(category="ethereum", size=2 * 222, symbol_amount=2),
     ]
+    # Categorized rows are not needed for the statistics
+    assert SP._row_data_with_category is None
+    assert len(SP.row_data_with_category) == len(APP_DATA)
+    assert SP._get_categories_statistics()[0] == CategoryStatistics(
+        category=None, size=3 * 999, symbol_amount=3
+    )
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 import json
-import tempfile
 from pathlib import Path
 
+import pytest
+
 from binsize import settings
 from binsize.lib.source_definition_cache import SourceDefinitionCache
 
-HERE = Path(__file__).resolve().parent
-
 
 def test_is_in():
     CACHE = SourceDefinitionCache()
@@ -82,41 +81,132 @@ def test_is_invalidated():
     assert CACHE.is_invalidated("empty") is False
 
 
-def test_load_cache_from_file():
-    with tempfile.NamedTemporaryFile("w+", suffix=".json", dir=HERE) as tmp:
-        content = {
-            "nist256p1": {
-                "definition": "vendor/trezor-crypto/nist256p1.c:26",
-                "file_hash": "829a11e46fec13e5be5d787ce0c61e4a",
-            },
-            "secp256k1": {
-                "definition": "vendor/trezor-crypto/secp256k1.c:26",
-                "file_hash": "file_hash",
-            },
-        }
-        json.dump(content, tmp, indent=4)
-        tmp.flush()
+def test_load_cache_from_file(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+    content = {
+        "nist256p1": {
+            "definition": "vendor/trezor-crypto/nist256p1.c:26",
+            "file_hash": "829a11e46fec13e5be5d787ce0c61e4a",
+        },
+        "secp256k1": {
+            "definition": "vendor/trezor-crypto/secp256k1.c:26",
+            "file_hash": "file_hash",
+        },
+    }
+    cache_file.write_text(json.dumps(content, indent=4))
+
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    assert len(CACHE.symbol_definitions) == 2
+    assert CACHE.get("nist256p1") == "vendor/trezor-crypto/nist256p1.c:26"
 
-        CACHE = SourceDefinitionCache(cache_file_path=tmp.name)
-        assert len(CACHE.symbol_definitions) == 2
-        assert CACHE.get("nist256p1") == "vendor/trezor-crypto/nist256p1.c:26"
 
-        # TODO: the JSON file is not deleted after test
+def test_save_cache_to_file(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    CACHE.add("nist256p1", "vendor/trezor-crypto/nist256p1.c:26")
+    CACHE.add("secp256k1", "vendor/trezor-crypto/secp256k1.c:26")
+
+    CACHE._save_cache_to_file()
 
+    content = json.loads(cache_file.read_text())
+    assert len(content) == 2
+    assert content["nist256p1"]["definition"] == "vendor/trezor-crypto/nist256p1.c:26"
 
-def test_save_cache_to_file():
-    with tempfile.NamedTemporaryFile("w+", suffix=".json", dir=HERE) as tmp:
-        CACHE = SourceDefinitionCache(cache_file_path=tmp.name)
-        CACHE.add("nist256p1", "vendor/trezor-crypto/nist256p1.c:26")
-        CACHE.add("secp256k1", "vendor/trezor-crypto/secp256k1.c:26")
 
+def test_interrupted_save_keeps_cache_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    cache_file = tmp_path / "cache.json"
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    CACHE.add("nist256p1", "vendor/trezor-crypto/nist256p1.c:26")
+    CACHE._save_cache_to_file()
+    saved = cache_file.read_text()
+
+    def _dumps(*args: object, **kwargs: object) -> str:
+        raise KeyboardInterrupt
+
+    CACHE.add("secp256k1", "vendor/trezor-crypto/secp256k1.c:26")
+    monkeypatch.setattr(json, "dumps", _dumps)
+    with pytest.raises(KeyboardInterrupt):
         CACHE._save_cache_to_file()
-        tmp.flush()
+    monkeypatch.undo()
+    assert cache_file.read_text() == saved
+    assert not list(tmp_path.glob("*.tmp"))
+
 
-        content = json.load(tmp)
-        assert len(content) == 2
-        assert (
-            content["nist256p1"]["definition"] == "vendor/trezor-crypto/nist256p1.c:26"
-        )
+def test_file_hashed_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    CACHE = SourceDefinitionCache()
+    source_file = tmp_path / "source.c"
+    source_file.write_text("int a;")
+    file_hash = CACHE._get_file_hash(source_file)
+    assert file_hash == "5b8ff0b44df608b9bb47431c2b46f6ce"
+    assert CACHE._get_file_hash(tmp_path / "missing.c") == ""
+
+    # Not read again when unchanged
+    monkeypatch.setattr(CACHE, "_compute_file_hash", lambda _: "not read")
+    assert CACHE._get_file_hash(source_file) == file_hash
+    source_file.write_text("int ab;")
+    assert CACHE._get_file_hash(source_file) == "not read"
+
+
+def test_file_hashes_persisted(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    cache_file = tmp_path / "cache.json"
+    source_file = tmp_path / "source.c"
+    source_file.write_text("int a;")
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    file_hash = CACHE._get_file_hash(source_file)
+    CACHE._save_cache_to_file()
+
+    NEW_CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    monkeypatch.setattr(NEW_CACHE, "_compute_file_hash", lambda _: "not read")
+    assert NEW_CACHE._get_file_hash(source_file) == file_hash
+
+
+def test_journal(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    CACHE.add("empty", "")
+    CACHE.add("other", "")
+    CACHE.add("empty", "some/file.c:12")
+
+    # Available even without saving the cache file (e.g. interrupted run)
+    assert not cache_file.exists()
+    NEW_CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    assert NEW_CACHE.get("empty") == "some/file.c:12"
+    assert NEW_CACHE.get("other") == ""
+
+    # Big journal gets compacted into the cache file
+    NEW_CACHE._close()
+    CACHE._close()
+    assert json.loads(cache_file.read_text())["empty"]["definition"] == (
+        "some/file.c:12"
+    )
+    assert not CACHE._journal_path().exists()
 
-        # TODO: the JSON file is not deleted after test
+
+def test_journal_unfinished_line(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    CACHE._journal_path().write_text('["unfinished","some/fi')
+    CACHE.add("empty", "")
+    CACHE._close_journal()
+
+    NEW_CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    assert NEW_CACHE.get("unfinished") is None
+    assert NEW_CACHE.get("empty") == ""
+
+
+def test_read_only_run_does_not_save(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+    CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    CACHE.add("empty", "")
+    CACHE._save_cache_to_file()
+    cache_file.write_text(cache_file.read_text() + " ")
+
+    NEW_CACHE = SourceDefinitionCache(cache_file_path=cache_file)
+    assert NEW_CACHE.get("empty") == ""
+    assert NEW_CACHE.is_invalidated("empty") is False
+    NEW_CACHE._close()
+    # Not rewritten
+    assert cache_file.read_text().endswith(" ")
+    assert not NEW_CACHE._journal_path().exists()